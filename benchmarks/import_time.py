@@ -0,0 +1,130 @@
+"""Import-time benchmark for the app's modules.
+
+Imports the app modules in a fresh interpreter with `python -X importtime`,
+reports the slowest top-level imports and checks that the heavy optional
+dependencies stay unloaded until first use.
+
+    python benchmarks/import_time.py           # print the report
+    python benchmarks/import_time.py --save    # rewrite the checked-in report
+    python benchmarks/import_time.py --check   # fail on a regression against it
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_time_report.txt")
+
+# Modules a Streamlit worker imports for main.py (besides streamlit itself)
+APP_MODULES = [
+    "utils", "indicators", "forecast", "ml_forecast", "lazy_imports",
+    "market_data", "providers", "data_cache", "rate_limiter", "coalescing",
+]
+
+# Dependencies that must only be imported on first use
+LAZY_MODULES = ["sklearn", "plotly", "yfinance", "joblib", "openpyxl"]
+
+# --check fails when the total grows by more than this fraction over the report
+TOLERANCE = 0.5
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+# Function to import the app once in a fresh interpreter
+def measure():
+    """Return ({module: (cumulative seconds, {direct import: seconds})}, [lazy modules that got loaded])
+
+    Only imports made by the app are counted; the interpreter's own
+    startup imports (site, encodings, ...) happen before it runs.
+    """
+    code = (
+        f"import sys; import {', '.join(APP_MODULES)}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    # -X importtime lists each module after its imports; nesting is two spaces per level
+    timings, children, started = {}, {}, False
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3)) // 2
+        name = match.group(4)
+        seconds = int(match.group(2)) / 1e6
+        started = started or name in APP_MODULES
+        if depth == 1:
+            children[name] = seconds
+        elif depth == 0:
+            if started:
+                timings[name] = (seconds, children)
+            children = {}
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return timings, loaded
+
+# Function to write the report text
+def report(timings, loaded, runs):
+    lines = [
+        f"Import time of the app modules (best of {runs} runs, Python {sys.version.split()[0]})",
+        f"total: {_total(timings) * 1000:.0f} ms",
+        "",
+        "cumulative ms per app import, with its slowest direct imports:",
+    ]
+    for name, (seconds, children) in sorted(timings.items(), key=lambda item: -item[1][0]):
+        lines.append(f"  {seconds * 1000:8.1f}  {name}")
+        for child, child_seconds in sorted(children.items(), key=lambda item: -item[1])[:5]:
+            if child_seconds >= 0.001:
+                lines.append(f"  {child_seconds * 1000:8.1f}    {child}")
+    lines += ["", f"lazy dependencies loaded at import: {', '.join(loaded) or 'none'}"]
+    return "\n".join(lines) + "\n"
+
+# Function to add up the app's import time
+def _total(timings):
+    return sum(seconds for seconds, _ in timings.values())
+
+# Function to read the total back from a saved report
+def saved_total():
+    try:
+        with open(REPORT_PATH) as f:
+            match = re.search(r"^total: (\d+) ms", f.read(), re.MULTILINE)
+    except FileNotFoundError:
+        return None
+    return int(match.group(1)) / 1000 if match else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the app modules")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (default: 5)")
+    parser.add_argument("--save", action="store_true", help=f"Write the report to {os.path.relpath(REPORT_PATH, ROOT)}")
+    parser.add_argument("--check", action="store_true", help="Exit with an error on a regression against the saved report")
+    args = parser.parse_args(argv)
+
+    # The fastest run is the least disturbed by the rest of the machine
+    runs = [measure() for _ in range(args.runs)]
+    timings, loaded = min(runs, key=lambda run: _total(run[0]))
+    text = report(timings, loaded, args.runs)
+    print(text, end="")
+
+    if args.save:
+        with open(REPORT_PATH, "w") as f:
+            f.write(text)
+    if args.check:
+        problems = []
+        if loaded:
+            problems.append(f"imported eagerly: {', '.join(loaded)}")
+        baseline = saved_total()
+        total = _total(timings)
+        if baseline is not None and total > baseline * (1 + TOLERANCE):
+            problems.append(f"total {total * 1000:.0f} ms is over {baseline * 1000:.0f} ms + {TOLERANCE:.0%}")
+        for problem in problems:
+            print(f"Regression: {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import Future
+
+# Calls in flight, shared by every caller asking for the same key
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+# Keys currently being refreshed in the background
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+# Function to coalesce concurrent identical requests
+def single_flight(key, fetch):
+    """Run fetch() once for all concurrent callers with the same key and share its result"""
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _in_flight[key] = future
+    if leader:
+        try:
+            future.set_result(fetch())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _in_flight_lock:
+                del _in_flight[key]
+    return future.result()
+
+# Function to run a refresh off the request path
+def refresh_in_background(key, refresh, *args):
+    """Start refresh(*args) in a daemon thread unless the same key is already refreshing"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            refresh(*args)
+        except Exception as e:
+            print(f"Background refresh error for {key}: {str(e)}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+# Function to check whether a key is being refreshed in the background
+def is_refreshing(key):
+    with _refreshing_lock:
+        return key in _refreshing
@@ -0,0 +1,268 @@
+import math
+import os
+import time
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Directory holding cached price history (one file per ticker and period)
+CACHE_DIR = os.environ.get("STOCK_CACHE_DIR", ".stock_cache")
+
+# How long (in seconds) cached history is served before going back to the provider
+CACHE_TTL_SECONDS = int(os.environ.get("STOCK_CACHE_TTL", 60 * 60))
+
+# Company fields the app displays and how long (in seconds) each stays fresh.
+# Descriptive fields rarely change; market cap moves with the price.
+FUNDAMENTAL_TTLS = {
+    "longName": 30 * 24 * 60 * 60,
+    "sector": 30 * 24 * 60 * 60,
+    "industry": 30 * 24 * 60 * 60,
+    "country": 30 * 24 * 60 * 60,
+    "currency": 30 * 24 * 60 * 60,
+    "website": 30 * 24 * 60 * 60,
+    "longBusinessSummary": 7 * 24 * 60 * 60,
+    "marketCap": 15 * 60,
+}
+
+# Fields that move with the price; the provider's lightweight quote call refreshes them without stock.info
+QUOTE_FIELDS = ("marketCap",)
+
+# Keep one full ("max") series per ticker and slice every period from it locally
+FETCH_FULL_HISTORY = os.environ.get("STOCK_FETCH_FULL_HISTORY", "1") != "0"
+
+# Opt-in compact mode: float32 prices, uint32 volume and no dividend/split columns in memory
+COMPACT_MODE = os.environ.get("STOCK_COMPACT", "0") == "1"
+
+# Columns kept in compact mode; dividends and splits only matter when refreshing the cache
+COMPACT_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Length of each selectable period, used to trim merged history back to size
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Trading days per calendar year, used to turn warm-up bars into a calendar span
+TRADING_DAYS_PER_YEAR = 252
+
+# Function to build the on-disk path for a file kept per ticker
+def cache_path(ticker, name, directory=None, extension="pkl"):
+    """<directory>/<TICKER>_<name>.<extension>; directory defaults to CACHE_DIR"""
+    if directory is None:
+        directory = CACHE_DIR
+    safe_ticker = ticker.upper().replace("/", "_").replace("\\", "_")
+    return os.path.join(directory, f"{safe_ticker}_{name}.{extension}")
+
+# Function to read a file if it is recent enough
+def read_file(path, max_age, load=pd.read_pickle):
+    """Return load(path) if the file exists and is at most max_age seconds old, otherwise None"""
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        return load(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Cache read error for {path}: {str(e)}")
+        return None
+
+# Function to write a file atomically
+def write_file(path, value, dump=pd.to_pickle):
+    """Dump to a temporary file and rename it, so concurrent sessions never see a partial file"""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        dump(value, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Cache write error for {path}: {str(e)}")
+
+# Function to read a cache entry
+def _read_entry(ticker, name, max_age):
+    return read_file(cache_path(ticker, name), max_age)
+
+# Function to write a cache entry
+def _write_entry(ticker, name, value):
+    write_file(cache_path(ticker, name), value)
+
+# Function to read cached history
+def load_history(ticker, period, max_age=None):
+    """Return cached history if it exists and is fresh, otherwise None"""
+    if max_age is None:
+        max_age = CACHE_TTL_SECONDS
+    return _read_entry(ticker, period, max_age)
+
+# Function to check whether a file was written at most max_age seconds ago
+def is_file_fresh(path, max_age):
+    try:
+        return time.time() - os.path.getmtime(path) <= max_age
+    except OSError:
+        return False
+
+# Function to check whether a cache entry is still fresh
+def is_fresh(ticker, period, max_age=None):
+    if max_age is None:
+        max_age = CACHE_TTL_SECONDS
+    return is_file_fresh(cache_path(ticker, period), max_age)
+
+# Function to report when a cache entry was last written
+def last_updated(ticker, period):
+    """Return the time a cache entry was last refreshed, or None if it does not exist"""
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(cache_path(ticker, period)))
+    except OSError:
+        return None
+
+# Function to pick the first date a delta fetch needs
+def delta_start(cached):
+    """Start from the last cached bar, which may have been a partial session"""
+    return cached.index[-1].strftime("%Y-%m-%d")
+
+# Function to check whether a delta carries price adjustments
+def has_adjustments(delta, after=None):
+    """Dividends and splits re-adjust the whole history, so a delta cannot be appended.
+
+    Only bars after `after` (the last cached bar) count: the delta re-requests
+    that bar, and an adjustment on it is already reflected in the cache.
+    """
+    if after is not None and not delta.empty:
+        after = pd.Timestamp(after)
+        # Batch downloads come back with naive timestamps; compare on the delta's terms
+        if delta.index.tz is None and after.tz is not None:
+            after = after.tz_localize(None)
+        elif delta.index.tz is not None and after.tz is None:
+            after = after.tz_localize(delta.index.tz)
+        delta = delta[delta.index > after]
+    for column in ("Dividends", "Stock Splits"):
+        if column in delta.columns and (delta[column].fillna(0) != 0).any():
+            return True
+    return False
+
+# Function to append newly fetched bars to cached history
+def merge_history(cached, delta, period):
+    """Merge a delta into cached history and trim it back to the period length"""
+    if delta is None or delta.empty:
+        return cached
+    # Batch downloads come back with naive timestamps; align them with the cache
+    if delta.index.tz is None and cached.index.tz is not None:
+        delta = delta.tz_localize(cached.index.tz)
+    elif delta.index.tz is not None and cached.index.tz is None:
+        delta = delta.tz_localize(None)
+    merged = pd.concat([cached, delta.reindex(columns=cached.columns)])
+    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is not None:
+        merged = merged[merged.index >= merged.index[-1] - offset]
+    return merged
+
+# Function to pick which cache entry backs a requested period
+def source_period(period, warmup=0):
+    """Period to fetch and cache so `period` plus `warmup` earlier bars can be sliced from it"""
+    if FETCH_FULL_HISTORY or not warmup or period not in PERIOD_OFFSETS:
+        return "max" if FETCH_FULL_HISTORY else period
+    # A week of slack covers market holidays the trading-day estimate misses
+    now = pd.Timestamp.now()
+    needed = now - PERIOD_OFFSETS[period] - pd.Timedelta(
+        days=math.ceil(warmup * 365 / TRADING_DAYS_PER_YEAR) + 7
+    )
+    for name, offset in PERIOD_OFFSETS.items():
+        if now - offset <= needed:
+            return name
+    return "max"
+
+# Function to cut a period out of a longer history
+def slice_period(data, period, warmup=0):
+    """Return the trailing period as a positional slice (a view, not a copy).
+
+    warmup extra bars before the period are kept when the history has them,
+    so long-window indicators are already valid on the period's first bar.
+    Even "max" returns a new frame object, so callers sharing one cached
+    series can add columns to their slice without touching each other's.
+    """
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is None or data.empty:
+        return data.iloc[0:]
+    start = data.index.searchsorted(data.index[-1] - offset)
+    return data.iloc[max(start - warmup, 0):]
+
+# Function to shrink history to the columns and precision the app needs
+def compact_history(data):
+    """Return float32 prices and uint32 volume, without the dividend/split columns.
+
+    float32 keeps about 7 significant digits (relative error at most 6e-8),
+    far below a cent for any listed price. Volume keeps its original type
+    when it has gaps (as in ragged panels), is negative or does not fit in
+    uint32. Works on one history or a (field, ticker) panel; the cached
+    series on disk keep full precision.
+    """
+    present = set(data.columns.get_level_values(0))
+    blocks = {}
+    for field in [f for f in COMPACT_COLUMNS if f in present]:
+        values = data[field].to_numpy()
+        if field != "Volume":
+            values = values.astype(np.float32)
+        elif not np.isnan(values.astype(float)).any() and values.size and values.min() >= 0 \
+                and values.max() <= np.iinfo(np.uint32).max:
+            values = values.astype(np.uint32)
+        blocks[field] = values
+    if data.columns.nlevels == 1:
+        return pd.DataFrame(blocks, index=data.index)
+    # Build each field's block in one piece; converting column by column is slow on wide panels
+    return pd.concat({
+        field: pd.DataFrame(values, index=data.index, columns=data[field].columns)
+        for field, values in blocks.items()
+    }, axis=1)
+
+# Function to write history to the cache
+def save_history(ticker, period, data):
+    _write_entry(ticker, period, data)
+
+# Function to read cached fundamentals
+def load_fundamentals(ticker):
+    """Return the cached {field: (value, fetched_at)} record, whatever its age"""
+    return _read_entry(ticker, "fundamentals", float("inf"))
+
+# Function to write fundamentals to the cache
+def save_fundamentals(ticker, record):
+    _write_entry(ticker, "fundamentals", record)
+
+# Function to list the fundamentals that have outlived their TTL
+def stale_fields(record, now=None):
+    if now is None:
+        now = time.time()
+    return [
+        field for field, ttl in FUNDAMENTAL_TTLS.items()
+        if field not in record or now - record[field][1] > ttl
+    ]
+
+# Function to fold freshly fetched values into a fundamentals record
+def merge_fundamentals(record, info, fields=None, now=None):
+    """Keep only the displayed fields; a field missing from info keeps its cached value.
+
+    Only `fields` (default: every displayed field, as a full stock.info
+    covers them all) are re-stamped, so a quote refresh leaves the TTLs of
+    the descriptive fields running. Fields the provider does not report for
+    a ticker (e.g. sector for an ETF) are still re-stamped, so they are not
+    treated as stale on every request.
+    """
+    if now is None:
+        now = time.time()
+    if fields is None:
+        fields = FUNDAMENTAL_TTLS
+    merged = dict(record or {})
+    for field in fields:
+        value = info.get(field)
+        if value is None and field in merged:
+            value = merged[field][0]
+        merged[field] = (value, now)
+    return merged
+
+# Function to flatten a fundamentals record into plain values
+def fundamentals_values(record):
+    return {field: value for field, (value, _) in record.items() if value is not None}
@@ -0,0 +1,158 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# Days of history the forecast learns its drift and volatility from
+LOOKBACK_DAYS = 30
+
+# Largest daily move a forecast step may take, either way
+MAX_DAILY_CHANGE = 0.03
+
+# Simulated price paths per forecast and the percentiles bounding the "Possible Range"
+SIMULATED_PATHS = 10_000
+BAND_PERCENTILES = (5, 95)
+
+
+class Forecast:
+    """Short-term price forecast computed once and shared by the chart and the metrics.
+
+    paths holds every simulated path (paths x days); prices is their
+    median per day, upper/lower the BAND_PERCENTILES "Possible Range" and
+    dates the calendar days they fall on. volatility and drift are the
+    daily standard deviation and mean of recent returns.
+    """
+
+    __slots__ = ("last_price", "dates", "paths", "prices", "upper", "lower", "volatility", "drift")
+
+    def __init__(self, last_price, dates, paths, volatility, drift):
+        self.last_price = last_price
+        self.dates = dates
+        self.paths = paths
+        self.volatility = volatility
+        self.drift = drift
+        lower, middle, upper = np.percentile(paths, [BAND_PERCENTILES[0], 50, BAND_PERCENTILES[1]], axis=0)
+        self.prices = middle
+        self.upper = upper
+        self.lower = lower
+
+    def percentiles(self, q):
+        """Empirical percentile(s) of the simulated prices for each forecast day"""
+        return np.percentile(self.paths, q, axis=0)
+
+    @property
+    def change_pct(self):
+        """Forecast change from the last close to the final day, in percent"""
+        return (self.prices[-1] - self.last_price) / self.last_price * 100
+
+
+# Function to forecast the next few days from recent trends
+def forecast_prices(data, days=7, seed=None, paths=SIMULATED_PATHS):
+    """Monte Carlo forecast of `days` closes from the drift and volatility of the last LOOKBACK_DAYS.
+
+    On every path each day moves by the average daily change plus noise
+    with half the daily volatility, clamped to +/-MAX_DAILY_CHANGE; all
+    paths are simulated together as one (paths x days) matrix. Pass a
+    seed to make the forecast reproducible.
+    """
+    close = data["Close"].to_numpy(dtype=float)[-LOOKBACK_DAYS:]
+    if len(close) < 2:
+        raise ValueError("Not enough price history to forecast")
+    changes = close[1:] / close[:-1] - 1
+    drift = float(changes.mean())
+    volatility = float(changes.std(ddof=1)) if len(changes) > 1 else 0.0
+    last_price = float(close[-1])
+
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(drift, volatility / 2, (paths, days))
+    np.clip(steps, -MAX_DAILY_CHANGE, MAX_DAILY_CHANGE, out=steps)
+    steps += 1
+    simulated = last_price * np.cumprod(steps, axis=1, out=steps)
+
+    dates = pd.date_range(start=data.index[-1] + pd.Timedelta(days=1), periods=days, freq="D")
+    return Forecast(last_price, dates, simulated, volatility, drift)
+
+
+class BatchForecast:
+    """Forecasts for many tickers at once.
+
+    prices, upper and lower are (day x ticker) frames indexed by the
+    forecast dates (arrays when the input was an array); last_price,
+    volatility and drift hold one value per ticker. Simulated paths are
+    reduced to percentiles chunk by chunk and not kept.
+    """
+
+    __slots__ = ("last_price", "dates", "prices", "upper", "lower", "volatility", "drift")
+
+    def __init__(self, last_price, dates, prices, upper, lower, volatility, drift):
+        self.last_price = last_price
+        self.dates = dates
+        self.prices = prices
+        self.upper = upper
+        self.lower = lower
+        self.volatility = volatility
+        self.drift = drift
+
+    @property
+    def change_pct(self):
+        """Forecast change from each ticker's last close to the final day, in percent"""
+        final = self.prices.iloc[-1] if hasattr(self.prices, "iloc") else self.prices[-1]
+        return (final - self.last_price) / self.last_price * 100
+
+
+# Function to forecast a whole watchlist in one vectorized pass
+def forecast_batch(close, days=7, seed=None, paths=SIMULATED_PATHS, chunk_size=4_000_000):
+    """Forecast every column of a (time x ticker) close matrix, e.g. panel["Close"].
+
+    Uses the same model and number of paths as forecast_prices on each
+    ticker's last LOOKBACK_DAYS closes, so the bands match the app's;
+    lower paths to trade band precision for speed on large universes.
+    Tickers whose history starts later or ends earlier use their own last
+    valid closes. Paths are simulated for as many tickers at a time as fit
+    in chunk_size values.
+    """
+    labels = (close.index, close.columns) if hasattr(close, "columns") else None
+    values = close.to_numpy(dtype=float) if hasattr(close, "to_numpy") else np.asarray(close, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    # Move each column's missing rows to the top so its last closes sit at the bottom
+    order = np.argsort(~np.isnan(values), axis=0, kind="stable")
+    recent = np.take_along_axis(values, order, axis=0)[-LOOKBACK_DAYS:]
+    changes = recent[1:] / recent[:-1] - 1
+    with warnings.catch_warnings():
+        # Tickers with fewer than two closes come out as NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        drift = np.nanmean(changes, axis=0)
+        volatility = np.nanstd(changes, axis=0, ddof=1)
+    volatility = np.where(np.isnan(volatility) & ~np.isnan(drift), 0.0, volatility)
+    last_price = recent[-1]
+
+    tickers = values.shape[1]
+    bands = np.full((3, days, tickers), np.nan)
+    rng = np.random.default_rng(seed)
+    step = max(1, chunk_size // max(paths * days, 1))
+    for start in range(0, tickers, step):
+        stop = min(start + step, tickers)
+        steps = rng.normal(drift[start:stop], volatility[start:stop] / 2, (paths, days, stop - start))
+        np.clip(steps, -MAX_DAILY_CHANGE, MAX_DAILY_CHANGE, out=steps)
+        steps += 1
+        simulated = last_price[start:stop] * np.cumprod(steps, axis=1, out=steps)
+        bands[:, :, start:stop] = np.percentile(
+            simulated, [BAND_PERCENTILES[0], 50, BAND_PERCENTILES[1]], axis=0
+        )
+
+    lower, prices, upper = bands
+    if labels is None:
+        return BatchForecast(last_price, None, prices, upper, lower, volatility, drift)
+    dates = pd.date_range(start=labels[0][-1] + pd.Timedelta(days=1), periods=days, freq="D")
+
+    def frame(block):
+        return pd.DataFrame(block, index=dates, columns=labels[1])
+
+    def series(row):
+        return pd.Series(row, index=labels[1])
+
+    return BatchForecast(
+        series(last_price), dates, frame(prices), frame(upper), frame(lower),
+        series(volatility), series(drift),
+    )
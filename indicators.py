@@ -0,0 +1,501 @@
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Function to turn a Series/array into a contiguous float64 array
+def _as_array(values):
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy(dtype=float)
+    return np.ascontiguousarray(values, dtype=float)
+
+# Function to get the previous row of a series or (time x ticker) matrix
+def _previous(values):
+    """Shift down one row along time, with NaN in the first row"""
+    return np.concatenate((np.full((1,) + values.shape[1:], np.nan), values[:-1]))
+
+# Function to prefix a cumulative sum with a row of zeros
+def _cumsum0(values):
+    return np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)))
+
+# Function to compute a rolling mean with one cumulative sum
+def rolling_mean(values, window):
+    """Mean of the last `window` values along time; NaN until the window is full or if it holds a NaN.
+
+    Works on a 1-D series or column-wise on a 2-D (time x ticker) matrix.
+    """
+    values = _as_array(values)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or len(values) < window:
+        return out
+    valid = ~np.isnan(values)
+    if valid.all():
+        sums = _cumsum0(values)
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+        return out
+    sums = _cumsum0(np.where(valid, values, 0.0))
+    counts = _cumsum0(valid)
+    window_sums = sums[window:] - sums[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    out[window - 1:] = np.where(full, window_sums / window, np.nan)
+    return out
+
+# Function to compute a rolling sample standard deviation with cumulative sums
+def rolling_std(values, window):
+    """Sample (ddof=1) standard deviation over `window` values, matching pandas rolling().std()"""
+    values = _as_array(values)
+    out = np.full(values.shape, np.nan)
+    if window <= 1 or len(values) < window:
+        return out
+    valid = ~np.isnan(values)
+    # Shift each column by its first value so the sum of squares does not lose precision
+    first = np.expand_dims(np.argmax(valid, axis=0), 0)
+    reference = np.nan_to_num(np.take_along_axis(values, first, axis=0))
+    shifted = np.where(valid, values - reference, 0.0)
+    sums = _cumsum0(shifted)
+    squares = _cumsum0(shifted * shifted)
+    counts = _cumsum0(valid)
+    s1 = sums[window:] - sums[:-window]
+    s2 = squares[window:] - squares[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    variance = np.maximum((s2 - s1 * s1 / window) / (window - 1), 0.0)
+    out[window - 1:] = np.where(full, np.sqrt(variance), np.nan)
+    return out
+
+# Function to compute an exponential moving average
+def ema(values, span):
+    """EMA matching pandas ewm(span=span, adjust=False); leading NaNs are skipped, gaps carried.
+
+    For a 2-D matrix span may also be an array with one span per column.
+    The recursion runs in pandas' compiled ewm, over all columns sharing a span at once.
+    """
+    values = _as_array(values)
+    if values.ndim == 1:
+        return pd.Series(values).ewm(span=span, adjust=False, ignore_na=True).mean().to_numpy()
+    spans = np.broadcast_to(np.asarray(span, dtype=float), values.shape[1:])
+    out = np.empty(values.shape)
+    for value in np.unique(spans):
+        columns = spans == value
+        block = pd.DataFrame(values[:, columns])
+        out[:, columns] = block.ewm(span=value, adjust=False, ignore_na=True).mean().to_numpy()
+    return out
+
+# Function to compute a rolling extreme over fixed windows
+def _rolling_extreme(values, window, reduce):
+    values = _as_array(values)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or len(values) < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+    # A NaN anywhere in the window propagates, as in rolling_mean
+    out[window - 1:] = reduce(windows, axis=-1)
+    return out
+
+# Function to compute a rolling maximum
+def rolling_max(values, window):
+    return _rolling_extreme(values, window, np.max)
+
+# Function to compute a rolling minimum
+def rolling_min(values, window):
+    return _rolling_extreme(values, window, np.min)
+
+# Number of indicator results kept in memory across reruns and sessions
+MEMO_SIZE = 128
+
+# An EMA is given this many spans of history to settle; after three spans its seed weighs under 0.5%
+EMA_WARMUP_SPANS = 3
+
+# Nodes of the indicator graph: name -> (function(graph, *params), parameter defaults, lookback(*params))
+_NODES = {}
+
+# Decorator to register a node of the indicator graph
+def node(name, lookback=None):
+    """Register a node; lookback(*params) gives the bars it needs before its first usable value"""
+    def register(func):
+        parameters = list(inspect.signature(func).parameters.values())[1:]
+        _NODES[name] = (func, [p.default for p in parameters], lookback)
+        return func
+    return register
+
+# Function to bring a key into one canonical form
+def _canonical(key):
+    """("macd", 12, 26) and ("macd", 12, 26, "close") must share one memo entry"""
+    if isinstance(key, str):
+        return (key,)
+    name, *params = key
+    params = [_canonical(p) if isinstance(p, (str, tuple)) else p for p in params]
+    if name in _NODES:
+        defaults = _NODES[name][1]
+        params += [
+            _canonical(d) if isinstance(d, str) else d
+            for d in defaults[len(params):]
+        ]
+    return (name, *params)
+
+# Function to count the history bars a key needs before it is usable
+def lookback(key):
+    """Leading bars consumed by a key and its inputs; 0 for raw price columns"""
+    name, *params = _canonical(key)
+    if name not in _NODES or _NODES[name][2] is None:
+        return 0
+    return _NODES[name][2](*params)
+
+# Function to size the warm-up history for a set of outputs
+def warmup_bars(outputs=None):
+    """Extra bars to fetch before the displayed period so every output is warmed up on its first row"""
+    if outputs is None:
+        outputs = default_outputs()
+    return max((lookback(key) for key in outputs.values()), default=0)
+
+
+class IndicatorGraph:
+    """Lazily evaluated indicator dependency graph for one price history.
+
+    Every intermediate is addressed by a key such as ("ema", "close", 12)
+    and computed at most once; nodes ask the graph for their inputs, so a
+    shared intermediate (price changes, true range, a rolling std, the
+    12/26 EMAs) is reused by every indicator that depends on it.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._memo = {}
+
+    def get(self, key):
+        """Return the array for a key, computing it (and its inputs) on first use"""
+        key = _canonical(key)
+        if key not in self._memo:
+            name, *params = key
+            if name in _NODES:
+                self._memo[key] = _NODES[name][0](self, *params)
+            else:
+                self._memo[key] = _as_array(self.data[name.title()])
+        return self._memo[key]
+
+    def computed(self):
+        """Keys computed so far, in evaluation order"""
+        return list(self._memo)
+
+
+@node("delta", lambda source: lookback(source) + 1)
+def _delta(graph, source="close"):
+    values = graph.get(source)
+    return values - _previous(values)
+
+@node("returns", lambda source: lookback(("delta", source)))
+def _returns(graph, source="close"):
+    values = graph.get(source)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return graph.get(("delta", source)) / _previous(values)
+
+@node("avg_gain", lambda period, source: lookback(("sma", ("delta", source), period)))
+def _avg_gain(graph, period, source="close"):
+    # np.clip keeps the NaN of the first bar, so it never enters a window
+    return rolling_mean(np.clip(graph.get(("delta", source)), 0.0, None), period)
+
+@node("avg_loss", lambda period, source: lookback(("sma", ("delta", source), period)))
+def _avg_loss(graph, period, source="close"):
+    return rolling_mean(np.clip(-graph.get(("delta", source)), 0.0, None), period)
+
+@node("sma", lambda source, window: lookback(source) + window - 1)
+def _sma(graph, source, window):
+    return rolling_mean(graph.get(source), window)
+
+@node("std", lambda source, window: lookback(source) + window - 1)
+def _std(graph, source, window):
+    return rolling_std(graph.get(source), window)
+
+@node("ema", lambda source, span: lookback(source) + EMA_WARMUP_SPANS * span)
+def _ema(graph, source, span):
+    return ema(graph.get(source), span)
+
+@node("rsi", lambda period, source: lookback(("avg_gain", period, source)))
+def _rsi(graph, period=14, source="close"):
+    """RSI from simple moving averages of gains and losses.
+
+    The first bar has no change and is excluded. When the window holds no
+    losses RSI is 100 (50 if the price did not move at all).
+    """
+    avg_gain = graph.get(("avg_gain", period, source))
+    avg_loss = graph.get(("avg_loss", period, source))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), out)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, out)
+
+@node("bollinger_upper", lambda window, num_std, source: lookback(("std", source, window)))
+def _bollinger_upper(graph, window=20, num_std=2, source="close"):
+    return graph.get(("sma", source, window)) + num_std * graph.get(("std", source, window))
+
+@node("bollinger_lower", lambda window, num_std, source: lookback(("std", source, window)))
+def _bollinger_lower(graph, window=20, num_std=2, source="close"):
+    return graph.get(("sma", source, window)) - num_std * graph.get(("std", source, window))
+
+@node("macd", lambda fast, slow, source: lookback(("ema", source, max(fast, slow))))
+def _macd(graph, fast=12, slow=26, source="close"):
+    return graph.get(("ema", source, fast)) - graph.get(("ema", source, slow))
+
+@node("macd_signal", lambda fast, slow, signal, source: lookback(("ema", ("macd", fast, slow, source), signal)))
+def _macd_signal(graph, fast=12, slow=26, signal=9, source="close"):
+    return graph.get(("ema", ("macd", fast, slow, source), signal))
+
+@node("ppo", lambda fast, slow, source: lookback(("macd", fast, slow, source)))
+def _ppo(graph, fast=12, slow=26, source="close"):
+    """Percentage Price Oscillator, sharing its EMAs with MACD"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 * graph.get(("macd", fast, slow, source)) / graph.get(("ema", source, slow))
+
+@node("true_range")
+def _true_range(graph):
+    high, low, close = graph.get("high"), graph.get("low"), graph.get("close")
+    prev_close = _previous(close)
+    # fmax ignores the missing previous close on the first bar
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+@node("atr", lambda period: lookback(("sma", ("true_range",), period)))
+def _atr(graph, period=14):
+    return graph.get(("sma", ("true_range",), period))
+
+@node("plus_dm", lambda: lookback(("delta", "high")))
+def _plus_dm(graph):
+    up = graph.get(("delta", "high"))
+    down = -graph.get(("delta", "low"))
+    return np.where((up > down) & (up > 0), up, np.where(np.isnan(up), np.nan, 0.0))
+
+@node("minus_dm", lambda: lookback(("delta", "low")))
+def _minus_dm(graph):
+    up = graph.get(("delta", "high"))
+    down = -graph.get(("delta", "low"))
+    return np.where((down > up) & (down > 0), down, np.where(np.isnan(down), np.nan, 0.0))
+
+@node("adx", lambda period: lookback(("sma", ("plus_dm",), period)) + period - 1)
+def _adx(graph, period=14):
+    """ADX from simple moving averages of the directional movement and the shared true range"""
+    atr = graph.get(("atr", period))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100.0 * graph.get(("sma", ("plus_dm",), period)) / atr
+        minus_di = 100.0 * graph.get(("sma", ("minus_dm",), period)) / atr
+        total = plus_di + minus_di
+        dx = np.where(total == 0, 0.0, 100.0 * np.abs(plus_di - minus_di) / total)
+    return rolling_mean(dx, period)
+
+@node("obv")
+def _obv(graph):
+    """On-balance volume: volume is added on up days and subtracted on down days"""
+    close = graph.get("close")
+    flow = np.nan_to_num(np.sign(graph.get(("delta", "close"))) * graph.get("volume"))
+    # NaN until a series has its first bar, so ragged panel columns start cleanly
+    started = np.cumsum(~np.isnan(close), axis=0) > 0
+    return np.where(started, np.cumsum(flow, axis=0), np.nan)
+
+@node("rolling_max", lambda source, window: lookback(source) + window - 1)
+def _rolling_max_node(graph, source, window):
+    return rolling_max(graph.get(source), window)
+
+@node("rolling_min", lambda source, window: lookback(source) + window - 1)
+def _rolling_min_node(graph, source, window):
+    return rolling_min(graph.get(source), window)
+
+@node("stoch_k", lambda period: lookback(("rolling_max", "high", period)))
+def _stoch_k(graph, period=14):
+    """Stochastic %K: where the close sits in the high-low range of the last `period` bars"""
+    highest = graph.get(("rolling_max", "high", period))
+    lowest = graph.get(("rolling_min", "low", period))
+    span = highest - lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100.0 * (graph.get("close") - lowest) / span
+    # A flat range has no position within it; report the midpoint
+    return np.where(span == 0, 50.0, k)
+
+@node("stoch_d", lambda period, smooth: lookback(("sma", ("stoch_k", period), smooth)))
+def _stoch_d(graph, period=14, smooth=3):
+    """Stochastic %D: simple moving average of %K"""
+    return graph.get(("sma", ("stoch_k", period), smooth))
+
+
+# Function to compute RSI
+def rsi(close, period=14):
+    return IndicatorGraph({"Close": close}).get(("rsi", period))
+
+# Function to compute Bollinger Bands
+def bollinger(close, window=20, num_std=2):
+    """Return (middle, upper, lower) bands; the rolling std is computed once for both bands"""
+    graph = IndicatorGraph({"Close": close})
+    return (
+        graph.get(("sma", "close", window)),
+        graph.get(("bollinger_upper", window, num_std)),
+        graph.get(("bollinger_lower", window, num_std)),
+    )
+
+# Function to compute MACD
+def macd(close, fast=12, slow=26, signal=9):
+    """Return (fast EMA, slow EMA, MACD line, signal line)"""
+    graph = IndicatorGraph({"Close": close})
+    return (
+        graph.get(("ema", "close", fast)),
+        graph.get(("ema", "close", slow)),
+        graph.get(("macd", fast, slow)),
+        graph.get(("macd_signal", fast, slow, signal)),
+    )
+
+
+class IndicatorResult:
+    """Indicator arrays for one price series, keyed by column name and aligned with its index"""
+
+    __slots__ = ("index", "_columns")
+
+    def __init__(self, index, columns):
+        self.index = index
+        self._columns = columns
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def columns(self):
+        """Indicator arrays keyed by the column names the plot functions expect"""
+        return dict(self._columns)
+
+
+# Function to map displayed column names to graph nodes
+def default_outputs(
+    rsi_period=14, bb_window=20, bb_std=2, macd_fast=12, macd_slow=26, macd_signal=9,
+    stoch_period=14, stoch_smooth=3, atr_period=14,
+):
+    return {
+        "RSI": ("rsi", rsi_period),
+        "50MA": ("sma", "close", 50),
+        "200MA": ("sma", "close", 200),
+        "20MA": ("sma", "close", bb_window),
+        "Upper Band": ("bollinger_upper", bb_window, bb_std),
+        "Lower Band": ("bollinger_lower", bb_window, bb_std),
+        "12EMA": ("ema", "close", macd_fast),
+        "26EMA": ("ema", "close", macd_slow),
+        "MACD": ("macd", macd_fast, macd_slow),
+        "Signal Line": ("macd_signal", macd_fast, macd_slow, macd_signal),
+        "%K": ("stoch_k", stoch_period),
+        "%D": ("stoch_d", stoch_period, stoch_smooth),
+        "ATR": ("atr", atr_period),
+        "ADX": ("adx", atr_period),
+        "OBV": ("obv",),
+    }
+
+
+# Function to pick the dtype indicator results are stored in
+def _result_dtype(close):
+    """float32 for compact (float32) prices, float64 otherwise; kernels always run in float64"""
+    dtypes = getattr(close, "dtypes", None)
+    if isinstance(dtypes, pd.Series):
+        dtype = dtypes.iloc[0] if len(dtypes) else None
+    else:
+        dtype = getattr(close, "dtype", None)
+    return np.float32 if dtype == np.float32 else np.float64
+
+# Function to compute every indicator the app displays
+def compute_indicators(data, outputs=None):
+    """Evaluate the requested {column: node key} outputs over one shared graph.
+
+    Results are float32 when the Close column is (see data_cache.compact_history).
+    """
+    if outputs is None:
+        outputs = default_outputs()
+    graph = IndicatorGraph(data)
+    dtype = _result_dtype(data["Close"])
+    return IndicatorResult(data.index, {
+        name: graph.get(key).astype(dtype, copy=False) for name, key in outputs.items()
+    })
+
+
+# Bounded LRU of indicator results, keyed by series identity and requested outputs
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+# Function to compute indicators once per series and parameter set
+def compute_indicators_cached(ticker, period, data, outputs=None):
+    """compute_indicators memoized on (ticker, period, last bar, outputs).
+
+    The key also holds the bar count and last close, so a partial session
+    bar that updates in place still produces fresh indicators. Cached arrays
+    are read-only because every caller shares them.
+    """
+    if outputs is None:
+        outputs = default_outputs()
+    if data.empty:
+        return compute_indicators(data, outputs)
+    key = (
+        ticker,
+        period,
+        data.index[-1],
+        len(data),
+        float(data["Close"].iloc[-1]),
+        str(data["Close"].dtype),
+        tuple(sorted((name, _canonical(k)) for name, k in outputs.items())),
+    )
+    with _memo_lock:
+        result = _memo.get(key)
+        if result is not None:
+            _memo.move_to_end(key)
+            return result
+
+    result = compute_indicators(data, outputs)
+    for values in result.columns().values():
+        values.flags.writeable = False
+    with _memo_lock:
+        _memo[key] = result
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return result
+
+
+# Function to right-align each column's valid rows
+def _align_order(valid):
+    """Row order per column that moves missing rows to the top, keeping bars in time order"""
+    return np.argsort(valid, axis=0, kind="stable")
+
+# Function to compute indicators for many tickers at once
+def compute_panel(panel, outputs=None):
+    """Compute indicators column-wise for a (time x ticker) panel in one vectorized pass.
+
+    panel is a frame with (field, ticker) columns as returned by
+    market_data.get_history_batch, a {field: time x ticker frame or array}
+    mapping, or a bare 2-D close matrix. Histories may be ragged: a ticker
+    may start later, stop earlier or skip dates another exchange traded.
+    Each column's bars (rows with a Close) are shifted to the bottom so the
+    kernels only ever see leading NaNs, then results are put back on their
+    original rows; rows without a bar come back as NaN.
+
+    Returns {output name: time x ticker frame}, or 2-D arrays for array input,
+    in float32 when the Close prices are float32.
+    """
+    if outputs is None:
+        outputs = default_outputs()
+    if isinstance(panel, np.ndarray):
+        panel = {"Close": panel}
+    if hasattr(panel, "columns") and getattr(panel.columns, "nlevels", 1) > 1:
+        panel = {field: panel[field] for field in panel.columns.get_level_values(0).unique()}
+
+    close = panel["Close"]
+    labels = (close.index, close.columns) if hasattr(close, "columns") else None
+    dtype = _result_dtype(close)
+    close = _as_array(close)
+    if close.ndim == 1:
+        close = close[:, None]
+    order = _align_order(~np.isnan(close))
+
+    aligned = {}
+    for field, values in panel.items():
+        if labels is not None and hasattr(values, "reindex"):
+            values = values.reindex(index=labels[0], columns=labels[1])
+        values = _as_array(values).reshape(close.shape)
+        aligned[field] = np.take_along_axis(values, order, axis=0)
+
+    graph = IndicatorGraph(aligned)
+    results = {}
+    for name, key in outputs.items():
+        out = np.empty(close.shape, dtype=dtype)
+        np.put_along_axis(out, order, graph.get(key), axis=0)
+        if labels is not None:
+            out = pd.DataFrame(out, index=labels[0], columns=labels[1])
+        results[name] = out
+    return results
@@ -0,0 +1,40 @@
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Heavy optional dependencies (scikit-learn, plotly, yfinance, joblib)
+    are bound through this at module level, so importing the app costs
+    nothing for them until a chart, model or download actually needs them.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        # import_module holds the import lock, so concurrent first uses import once
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+# Function to bind a module without importing it yet
+def lazy_import(name):
+    return LazyModule(name)
+
+# Function to check whether an optional dependency is installed, without importing it
+def is_available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
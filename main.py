@@ -1,5 +1,4 @@
 import streamlit as st
-import yfinance as yf
 import requests
 from requests.exceptions import RequestException
 from utils import (
@@ -13,9 +12,20 @@ from utils import (
     plot_atr,
     plot_obv,
     plot_adx,
-    predict_next_days,
     plot_simple_forecast,
 )
+from forecast import forecast_prices
+from ml_forecast import ml_forecast, is_training, TRAINING_PERIOD
+from lazy_imports import is_available
+from indicators import compute_indicators_cached, warmup_bars
+from data_cache import slice_period
+from market_data import (
+    get_history,
+    get_fundamentals,
+    is_refreshing,
+    submit,
+    provider_metrics,
+)
 import json
 from datetime import datetime
 import os
@@ -24,12 +34,6 @@ from io import BytesIO
 import time
 import numpy as np
 
-try:
-    import openpyxl
-except ImportError:
-    st.error("Please install openpyxl: pip install openpyxl")
-    st.stop()
-
 # Add this at the top of your file
 st.set_page_config(
     page_title="Stock Price Visualizer",
@@ -122,40 +126,51 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Function to fetch stock data with retry mechanism
-def fetch_stock_data(ticker, period, retries=5, backoff_factor=1):
-    for i in range(retries):
-        try:
-            stock = yf.Ticker(ticker)
-            data = stock.history(period=period)
-            if data.empty:
-                raise Exception("No data received")
-            return stock, data
-        except requests.exceptions.HTTPError as e:
-            if hasattr(e.response, 'status_code') and e.response.status_code == 429:
-                wait_time = backoff_factor * (2 ** i)
-                st.warning(f"Rate limit exceeded. Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            else:
-                st.error(f"HTTP error occurred: {str(e)}")
-                break
-        except RequestException as e:
-            st.error(f"Network error occurred: {str(e)}")
-            break
-        except Exception as e:
-            st.error(f"Error fetching data: {str(e)}")
-            break
+def fetch_stock_data(ticker, period, retries=5, backoff_factor=1, warmup=0):
+    """Return (data, last_updated); stale cached data is served while it refreshes"""
+    def warn_retry(wait_time):
+        st.warning(f"Rate limit exceeded. Retrying in {wait_time} seconds...")
+
+    try:
+        return get_history(ticker, period, retries, backoff_factor, on_retry=warn_retry, warmup=warmup)
+    except requests.exceptions.HTTPError as e:
+        if hasattr(e.response, 'status_code') and e.response.status_code == 429:
+            st.error("Rate limit exceeded.")
+        else:
+            st.error(f"HTTP error occurred: {str(e)}")
+    except RequestException as e:
+        st.error(f"Network error occurred: {str(e)}")
+    except Exception as e:
+        st.error(f"Error fetching data: {str(e)}")
     st.error("Failed to fetch stock data after multiple attempts. Please try again later.")
     return None, None
 
+# Function to collect company fundamentals, falling back to an empty dict
+def fetch_stock_info(info_future):
+    try:
+        info, _ = info_future.result()
+        return info
+    except Exception as e:
+        st.warning(f"Company information is unavailable: {str(e)}")
+        return {}
+
 # Add loading state
 if st.button("Show Stock Data"):
     with st.spinner("Loading stock data... Please wait..."):
-        stock, data = fetch_stock_data(ticker, period)
+        # Company info downloads at the same time as the price history
+        info_future = submit(get_fundamentals, ticker)
+        # Fetch enough earlier bars that the 200-day MA is valid from the first displayed day
+        warmup = warmup_bars()
+        history, updated_at = fetch_stock_data(ticker, period, warmup=warmup)
+        data = slice_period(history, period) if history is not None else None
+        info = fetch_stock_info(info_future) if data is not None else {}
 
     if data is not None and not data.empty:
         # Add success message
         st.success(f"Successfully loaded data for {ticker}")
+        if updated_at is not None:
+            refresh_note = " (refreshing in background)" if is_refreshing(ticker, period, warmup) else ""
+            st.caption(f"Last updated: {updated_at.strftime('%Y-%m-%d %H:%M:%S')}{refresh_note}")
         
         # Add a download button for the data
         csv = data.to_csv()
@@ -166,8 +181,7 @@ if st.button("Show Stock Data"):
             mime='text/csv',
         )
 
-        # Fetch Stock Information
-        info = stock.info # type: ignore
+        # Stock Information (fetched alongside the history above)
         company_name = info.get('longName', 'N/A')
         sector = info.get('sector', 'N/A')
         industry = info.get('industry', 'N/A')
@@ -209,7 +223,7 @@ if st.button("Show Stock Data"):
             #### How This Forecast Works:
             1. Analyzes recent price trends
             2. Considers market volatility
-            3. Calculates possible price ranges
+            3. Simulates thousands of possible price paths and shows the range 90% of them stay within
             4. Updates daily with new data
 
             ⚠️ **Important Warnings:**
@@ -227,14 +241,16 @@ if st.button("Show Stock Data"):
             """)
             
             try:
-                fig_forecast = plot_simple_forecast(data, ticker, currency)
+                # One forecast feeds both the chart and the stats, so they always agree
+                forecast = forecast_prices(data, days=7)
+                fig_forecast = plot_simple_forecast(data, ticker, currency, forecast)
                 st.plotly_chart(fig_forecast)
                 
                 # Show basic stats with enhanced context
-                predictions, volatility = predict_next_days(data, days=7)
-                if predictions:
-                    last_price = data['Close'].iloc[-1]
-                    pred_change = ((predictions[-1] - last_price) / last_price) * 100
+                predictions, volatility = forecast.prices, forecast.volatility
+                if len(predictions):
+                    last_price = forecast.last_price
+                    pred_change = forecast.change_pct
                     
                     col1, col2 = st.columns(2)
                     with col1:
@@ -266,12 +282,34 @@ if st.button("Show Stock Data"):
                     
                     *Remember: Higher volatility means higher risk!*
                     """)
+
+                # Machine-learning estimate; models are (re)trained in the background, never while the page renders
+                try:
+                    ml_predictions = ml_forecast(ticker, days=7, wait=False)
+                    if ml_predictions is None:
+                        st.info("⏳ Training a machine-learning model for this stock in the background. Its estimate will appear when you load the data again.")
+                    else:
+                        ml_change = ((ml_predictions.iloc[-1] - forecast.last_price) / forecast.last_price) * 100
+                        st.metric(
+                            "7-Day Estimate (Random Forest model)",
+                            f"{currency} {ml_predictions.iloc[-1]:.2f}",
+                            f"{ml_change:+.2f}%"
+                        )
+                        retrain_note = " (retraining on newer data in background)" if is_training(ticker) else ""
+                        st.caption(f"Trained on {TRAINING_PERIOD} of daily returns and technical indicators for this stock{retrain_note}.")
+                except Exception as e:
+                    st.info(f"Machine-learning estimate is unavailable: {str(e)}")
                         
             except Exception as e:
                 st.error("Unable to generate forecast. Please try again with different data.")
 
         # Technical Indicators Section
         st.header("📊 Technical Indicators Guide")
+
+        # Compute every indicator together over the padded history (memoized across reruns),
+        # then trim to the displayed period
+        indicators = compute_indicators_cached(ticker, period, history).columns()
+        data = slice_period(history.assign(**indicators), period)
         
         # Enhanced Educational Overview
         with st.expander("❓ New to Technical Analysis? Start Here!", expanded=True):
@@ -346,13 +384,6 @@ if st.button("Show Stock Data"):
 
         # RSI with educational content
         with st.expander("💪 RSI - Momentum Indicator"):
-            # Calculate RSI
-            delta = data["Close"].astype(float).diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            data["RSI"] = 100 - (100 / (1 + rs))
-            
             st.markdown("""
             ### Relative Strength Index (RSI)
             
@@ -374,11 +405,6 @@ if st.button("Show Stock Data"):
 
         # Bollinger Bands with clear explanation
         with st.expander("🎯 Bollinger Bands - Volatility & Price Ranges"):
-            # Calculate Bollinger Bands
-            data["20MA"] = data["Close"].rolling(window=20).mean()
-            data["Upper Band"] = data["20MA"] + (data["Close"].rolling(window=20).std() * 2)
-            data["Lower Band"] = data["20MA"] - (data["Close"].rolling(window=20).std() * 2)
-            
             st.markdown("""
             ### Understanding Bollinger Bands
             
@@ -403,12 +429,6 @@ if st.button("Show Stock Data"):
 
         # MACD with beginner-friendly explanation
         with st.expander("🔄 MACD - Trend & Momentum Combined"):
-            # Calculate MACD
-            data["12EMA"] = data["Close"].ewm(span=12, adjust=False).mean()
-            data["26EMA"] = data["Close"].ewm(span=26, adjust=False).mean()
-            data["MACD"] = data["12EMA"] - data["26EMA"]
-            data["Signal Line"] = data["MACD"].ewm(span=9, adjust=False).mean()
-            
             st.markdown("""
             ### Moving Average Convergence Divergence (MACD)
             
@@ -430,6 +450,29 @@ if st.button("Show Stock Data"):
             fig_macd = plot_macd(data, ticker)
             st.plotly_chart(fig_macd)
 
+        # Stochastic Oscillator with simple explanation
+        with st.expander("🎢 Stochastic Oscillator - Momentum Within the Range"):
+            st.markdown("""
+            ### Stochastic Oscillator
+            
+            #### What It Measures:
+            Where today's close sits within the high-low range of the last 14 days.
+            
+            #### Key Components:
+            1. **%K Line**: Fast line - position of the close in the range (0-100)
+            2. **%D Line**: Slow line - 3-day average of %K
+            
+            #### Key Levels:
+            - **Above 80**: Overbought
+            - **Below 20**: Oversold
+            
+            #### Trading Signals:
+            - **Buy Signal**: %K crosses above %D below 20
+            - **Sell Signal**: %K crosses below %D above 80
+            """)
+            fig_stochastic = plot_stochastic_oscillator(data, ticker)
+            st.plotly_chart(fig_stochastic)
+
         # Volume Analysis with clear explanation
         with st.expander("📊 Volume - Trading Activity"):
             st.markdown("""
@@ -452,6 +495,63 @@ if st.button("Show Stock Data"):
             fig_volume = plot_volume(data, ticker)
             st.plotly_chart(fig_volume)
 
+        # On-Balance Volume with clear explanation
+        with st.expander("📦 OBV - Volume Behind the Move"):
+            st.markdown("""
+            ### On-Balance Volume (OBV)
+            
+            #### How It Works:
+            - Volume is **added** on days the price closes higher
+            - Volume is **subtracted** on days the price closes lower
+            
+            #### How to Read:
+            - **Rising OBV**: Buyers are in control
+            - **Falling OBV**: Sellers are in control
+            - **Divergence**: Price and OBV moving in opposite directions can warn of a reversal
+            """)
+            fig_obv = plot_obv(data, ticker)
+            st.plotly_chart(fig_obv)
+
+        # ATR with beginner-friendly explanation
+        with st.expander("📏 ATR - How Much the Price Moves"):
+            st.markdown("""
+            ### Average True Range (ATR)
+            
+            #### What It Measures:
+            The average daily price range over the last 14 days, including overnight gaps.
+            
+            #### How to Read:
+            - **High ATR**: Large daily swings - higher risk
+            - **Low ATR**: Small daily swings - calmer market
+            
+            #### Best Used For:
+            - Setting stop-loss distances
+            - Sizing positions to match volatility
+            
+            *ATR shows how much a stock moves, not which direction*
+            """)
+            fig_atr = plot_atr(data, ticker)
+            st.plotly_chart(fig_atr)
+
+        # ADX with clear explanation
+        with st.expander("🧭 ADX - Trend Strength"):
+            st.markdown("""
+            ### Average Directional Index (ADX)
+            
+            #### What It Measures:
+            How strong the current trend is, whether it is going up or down.
+            
+            #### Key Levels:
+            - **Below 20**: Weak or no trend (sideways market)
+            - **20 - 40**: Trend is developing or healthy
+            - **Above 40**: Very strong trend
+            
+            #### Pro Tip:
+            *Use ADX to decide whether trend-following indicators like MACD are worth trusting right now*
+            """)
+            fig_adx = plot_adx(data, ticker)
+            st.plotly_chart(fig_adx)
+
         # Add a glossary of terms
         with st.expander("📚 Technical Analysis Glossary"):
             st.markdown("""
@@ -572,17 +672,20 @@ if st.sidebar.checkbox("View Feedback (Admin)", key="show_feedback"):
                 all_feedback = json.load(f)
             
             if all_feedback:
-                # Add Excel download button
-                df = pd.DataFrame(all_feedback)
-                output = BytesIO()
-                df.to_excel(output, index=False)
-                excel_data = output.getvalue()
-                st.sidebar.download_button(
-                    label="📥 Download Feedback as Excel",
-                    data=excel_data,
-                    file_name="feedback_data.xlsx",
-                    mime="application/vnd.ms-excel"
-                )
+                # Add Excel download button (openpyxl is only needed, and imported, here)
+                if is_available("openpyxl"):
+                    df = pd.DataFrame(all_feedback)
+                    output = BytesIO()
+                    df.to_excel(output, index=False)
+                    excel_data = output.getvalue()
+                    st.sidebar.download_button(
+                        label="📥 Download Feedback as Excel",
+                        data=excel_data,
+                        file_name="feedback_data.xlsx",
+                        mime="application/vnd.ms-excel"
+                    )
+                else:
+                    st.sidebar.info("Install openpyxl to download feedback as Excel: pip install openpyxl")
                 
                 # Filter options
                 feedback_types = ["All"] + list(set(f["type"] for f in all_feedback))
@@ -631,6 +734,14 @@ if st.sidebar.checkbox("View Feedback (Admin)", key="show_feedback"):
                 
         except Exception as e:
             st.sidebar.error(f"Error loading feedback: {str(e)}")
+
+        # Rate limiter health for the shared data provider
+        st.sidebar.subheader("📡 Data Provider Rate Limit")
+        limiter_stats = provider_metrics()
+        st.sidebar.write(f"Queue depth: {limiter_stats['queue_depth']} (max {limiter_stats['max_queue_depth']})")
+        st.sidebar.write(f"Average wait: {limiter_stats['avg_wait_seconds']:.2f}s")
+        st.sidebar.write(f"Longest wait: {limiter_stats['max_wait_seconds']:.2f}s")
+        st.sidebar.write(f"Provider calls: {limiter_stats['acquired']}")
     elif admin_password:
         st.sidebar.error("Incorrect password!")
 
@@ -0,0 +1,258 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import pandas as pd
+from rate_limiter import provider_limiter
+from coalescing import single_flight, refresh_in_background, is_refreshing as _key_refreshing
+from providers import get_provider
+from data_cache import (
+    load_history,
+    save_history,
+    load_fundamentals,
+    save_fundamentals,
+    stale_fields,
+    merge_fundamentals,
+    fundamentals_values,
+    QUOTE_FIELDS,
+    is_fresh,
+    last_updated,
+    delta_start,
+    has_adjustments,
+    merge_history,
+    source_period,
+    slice_period,
+    compact_history,
+    COMPACT_MODE,
+)
+
+# Shared pool for provider calls that run alongside the request thread
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-data")
+
+# Function to call the provider with the retry mechanism
+def _with_retry(fetch, retries=5, backoff_factor=1, on_retry=None):
+    """Run fetch(), backing off exponentially whenever the provider answers 429"""
+    for i in range(retries):
+        try:
+            return fetch()
+        except requests.exceptions.HTTPError as e:
+            rate_limited = hasattr(e.response, 'status_code') and e.response.status_code == 429
+            if not rate_limited or i == retries - 1:
+                raise
+            wait_time = backoff_factor * (2 ** i)
+            if on_retry is not None:
+                on_retry(wait_time)
+            time.sleep(wait_time)
+
+# Function to download (or delta-update) one cached series
+def _download_history(ticker, source, cached):
+    provider = get_provider()
+    # Only download bars newer than the cached tail when possible
+    if cached is not None:
+        delta = provider.history(ticker, start=delta_start(cached))
+        if not has_adjustments(delta, after=cached.index[-1]):
+            return merge_history(cached, delta, source)
+    data = provider.history(ticker, period=source)
+    if data.empty:
+        raise Exception("No data received")
+    return data
+
+# Function to bring cached history up to date
+def download_history(ticker, period, retries=5, backoff_factor=1, on_retry=None, warmup=0):
+    """Refresh the cached history for a ticker from the provider and return the period.
+
+    warmup extra bars before the period are included when available.
+    """
+    source = source_period(period, warmup)
+
+    def fetch():
+        cached = load_history(ticker, source, max_age=float("inf"))
+        if cached is not None and cached.empty:
+            cached = None
+        data = _with_retry(
+            lambda: _download_history(ticker, source, cached), retries, backoff_factor, on_retry
+        )
+        save_history(ticker, source, data)
+        return data
+
+    # Sessions asking for the same series at the same time share one download
+    data = single_flight((ticker, source), fetch)
+    return slice_period(data, period, warmup)
+
+# Function to download company fundamentals
+def download_fundamentals(ticker, retries=5, backoff_factor=1, on_retry=None):
+    """Refresh the stale displayed fields of a ticker's fundamentals.
+
+    When only price-driven QUOTE_FIELDS (market cap) have expired they come
+    from the provider's lightweight quote(); stock.info is only downloaded
+    for a cold cache or an expired descriptive field. Only the fields the
+    call covered get a new timestamp.
+    """
+    def fetch():
+        record = load_fundamentals(ticker)
+        stale = stale_fields(record or {})
+        if record and all(field in QUOTE_FIELDS for field in stale):
+            if not stale:
+                return record
+            values = _with_retry(lambda: get_provider().quote(ticker), retries, backoff_factor, on_retry)
+            record = merge_fundamentals(record, values, fields=stale)
+        else:
+            info = _with_retry(lambda: get_provider().info(ticker), retries, backoff_factor, on_retry)
+            record = merge_fundamentals(record, info)
+        save_fundamentals(ticker, record)
+        return record
+
+    return single_flight((ticker, "fundamentals"), fetch)
+
+# Function to start a provider call without waiting for it
+def submit(fetch, *args, **kwargs):
+    """Run fetch on the shared pool and return its Future"""
+    return _executor.submit(fetch, *args, **kwargs)
+
+# Function to report rate limiter metrics
+def provider_metrics():
+    """Queue depth and wait times of the shared provider rate limiter"""
+    return provider_limiter.metrics()
+
+# Function to check whether a background refresh is running
+def is_refreshing(ticker, period=None, warmup=0):
+    name = "fundamentals" if period is None else source_period(period, warmup)
+    return _key_refreshing((ticker, name))
+
+# Function to get history using stale-while-revalidate
+def get_history(ticker, period, retries=5, backoff_factor=1, on_retry=None, warmup=0, compact=None):
+    """Serve cached history right away and refresh it in the background when stale.
+
+    Returns (data, last_updated). Only a cold cache waits on the provider.
+    With warmup, data starts that many bars before the period (taken from
+    the same cached series, so padding costs no extra request); slice the
+    result with data_cache.slice_period(data, period) once indicators are
+    computed. compact (default: STOCK_COMPACT) returns data_cache.compact_history(data).
+    """
+    if compact is None:
+        compact = COMPACT_MODE
+    source = source_period(period, warmup)
+    cached = load_history(ticker, source, max_age=float("inf"))
+    if cached is not None and not cached.empty:
+        if not is_fresh(ticker, source):
+            refresh_in_background(
+                (ticker, source), download_history, ticker, source, retries, backoff_factor
+            )
+        data = slice_period(cached, period, warmup)
+    else:
+        data = download_history(ticker, period, retries, backoff_factor, on_retry, warmup)
+    if compact:
+        data = compact_history(data)
+    return data, last_updated(ticker, source)
+
+# Function to get company fundamentals using stale-while-revalidate
+def get_fundamentals(ticker, retries=5, backoff_factor=1, on_retry=None):
+    """Serve cached fundamentals right away and refresh stale fields in the background.
+
+    Returns (fields, last_updated). Only a cold cache waits on the provider.
+    """
+    record = load_fundamentals(ticker)
+    if not record:
+        record = download_fundamentals(ticker, retries, backoff_factor, on_retry)
+    elif stale_fields(record):
+        refresh_in_background(
+            (ticker, "fundamentals"), download_fundamentals, ticker, retries, backoff_factor
+        )
+    return fundamentals_values(record), last_updated(ticker, "fundamentals")
+
+# Function to bring one group of cached series up to date
+def _refresh_group(tickers, source, cached, retries, backoff_factor):
+    """Return ({ticker: full series}, {ticker: error}) for one group"""
+    starts = [delta_start(cached[t]) for t in tickers if t in cached]
+    # A group where every ticker is cached only needs bars after the oldest tail
+    start = min(starts) if len(starts) == len(tickers) else None
+    try:
+        frames = _with_retry(
+            lambda: get_provider().download(tickers, period=source, start=start),
+            retries, backoff_factor,
+        )
+    except Exception as e:
+        print(f"Batch download error for {tickers}: {str(e)}")
+        frames = {}
+
+    results, failed = {}, {}
+    for ticker in tickers:
+        frame = frames.get(ticker)
+        if frame is not None and ticker in cached and not has_adjustments(frame, after=cached[ticker].index[-1]):
+            data = merge_history(cached[ticker], frame, source)
+        elif frame is not None and ticker not in cached:
+            data = frame
+        else:
+            # Anything the group request could not serve goes through the single-ticker path
+            try:
+                results[ticker] = download_history(ticker, source, retries, backoff_factor)
+            except Exception as e:
+                failed[ticker] = str(e)
+            continue
+        save_history(ticker, source, data)
+        results[ticker] = data
+    return results, failed
+
+# Function to fetch history for a whole watchlist
+def get_history_batch(
+    tickers, period, group_size=50, max_workers=4, retries=5, backoff_factor=1, warmup=0, compact=None,
+):
+    """Fetch many tickers at once over a bounded worker pool.
+
+    Fresh cache entries are served locally; the rest are downloaded in
+    groups of group_size tickers per provider request. Returns (panel,
+    failed) where panel has (field, ticker) columns aligned on date, so
+    panel["Close"] is a time x ticker frame, and failed maps each ticker
+    that could not be fetched to its error message. warmup pads each
+    series with that many earlier bars and compact shrinks the panel, as
+    in get_history.
+    """
+    if compact is None:
+        compact = COMPACT_MODE
+    source = source_period(period, warmup)
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+    series, cached, pending = {}, {}, []
+    for ticker in tickers:
+        data = load_history(ticker, source, max_age=float("inf"))
+        if data is not None and not data.empty:
+            cached[ticker] = data
+            if is_fresh(ticker, source):
+                series[ticker] = data
+                continue
+        pending.append(ticker)
+
+    # Group cached and cold tickers separately so cached groups can use delta fetches
+    warm = [t for t in pending if t in cached]
+    cold = [t for t in pending if t not in cached]
+    groups = [
+        batch[i:i + group_size]
+        for batch in (warm, cold)
+        for i in range(0, len(batch), group_size)
+    ]
+
+    failed = {}
+    if groups:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-batch") as pool:
+            jobs = [
+                pool.submit(_refresh_group, group, source, cached, retries, backoff_factor)
+                for group in groups
+            ]
+            for job in jobs:
+                results, errors = job.result()
+                series.update(results)
+                failed.update(errors)
+
+    frames = {}
+    for ticker in tickers:
+        if ticker in series:
+            data = slice_period(series[ticker], period, warmup)
+            # Drop time zones so tickers from different exchanges line up by date
+            if data.index.tz is not None:
+                data = data.tz_localize(None)
+            frames[ticker] = data
+    if not frames:
+        return pd.DataFrame(), failed
+    panel = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    if compact:
+        panel = compact_history(panel)
+    return panel, failed
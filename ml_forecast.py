@@ -0,0 +1,251 @@
+import os
+import numpy as np
+import pandas as pd
+from indicators import IndicatorGraph
+from lazy_imports import lazy_import
+from market_data import get_history, get_history_batch
+from coalescing import single_flight, refresh_in_background, is_refreshing
+from data_cache import cache_path, read_file, write_file, is_file_fresh
+
+# scikit-learn and joblib take about a second to import; load them when a model is first needed
+joblib = lazy_import("joblib")
+linear_model = lazy_import("sklearn.linear_model")
+ensemble = lazy_import("sklearn.ensemble")
+multioutput = lazy_import("sklearn.multioutput")
+
+# Directory holding trained models (one file per ticker, model and settings)
+MODEL_DIR = os.environ.get("STOCK_MODEL_DIR", ".stock_models")
+
+# How long (in seconds) a trained model is reused before it is retrained on newer data
+MODEL_TTL_SECONDS = int(os.environ.get("STOCK_MODEL_TTL", 24 * 60 * 60))
+
+# Every model is trained on this much history, whatever period the app is showing
+TRAINING_PERIOD = os.environ.get("STOCK_MODEL_PERIOD", "5y")
+
+# Cores one model may train on, so concurrent sessions cannot each claim every core
+TRAINING_JOBS = int(os.environ.get("STOCK_MODEL_JOBS", min(4, os.cpu_count() or 1)))
+
+# Error of the last failed training per model, reported to the next caller that finds no model
+_training_errors = {}
+
+# Models the pipeline can train: name -> function(n_jobs, random_state) building the scikit-learn estimator
+MODELS = {
+    "linear": lambda n_jobs, random_state: linear_model.LinearRegression(n_jobs=n_jobs),
+    "random_forest": lambda n_jobs, random_state: ensemble.RandomForestRegressor(
+        n_estimators=200, min_samples_leaf=5, n_jobs=n_jobs, random_state=random_state
+    ),
+    # Gradient boosting predicts one output, so fit one per horizon
+    "gradient_boosting": lambda n_jobs, random_state: multioutput.MultiOutputRegressor(
+        ensemble.GradientBoostingRegressor(random_state=random_state), n_jobs=n_jobs
+    ),
+}
+
+# Indicator features: column name -> indicator graph key
+INDICATOR_FEATURES = {
+    "rsi": ("rsi", 14),
+    "macd": ("macd", 12, 26),
+    "macd_signal": ("macd_signal", 12, 26, 9),
+    "bb_upper": ("bollinger_upper", 20, 2),
+    "bb_lower": ("bollinger_lower", 20, 2),
+    "atr": ("atr", 14),
+    "adx": ("adx", 14),
+    "stoch_k": ("stoch_k", 14),
+    "volume_sma": ("sma", "volume", 20),
+}
+
+
+# Function to build model features from a price history
+def build_features(data, lags=5):
+    """Lagged daily returns plus scale-free indicator features, one row per bar.
+
+    Prices enter only as ratios, so one model works across price levels.
+    Early rows are NaN until every indicator has warmed up.
+    """
+    graph = IndicatorGraph(data)
+    close = graph.get("close")
+    returns = graph.get("returns")
+    values = {name: graph.get(key) for name, key in INDICATOR_FEATURES.items()}
+    features = {
+        f"return_lag{lag}": np.concatenate((np.full(lag, np.nan), returns[:len(returns) - lag]))
+        for lag in range(lags)
+    }
+    with np.errstate(divide="ignore", invalid="ignore"):
+        band = values["bb_upper"] - values["bb_lower"]
+        features.update({
+            "rsi": values["rsi"] / 100,
+            "macd_histogram": (values["macd"] - values["macd_signal"]) / close,
+            "bollinger_position": np.where(band > 0, (close - values["bb_lower"]) / band, 0.5),
+            "atr_ratio": values["atr"] / close,
+            "adx": values["adx"] / 100,
+            "stoch_k": values["stoch_k"] / 100,
+            "volume_ratio": graph.get("volume") / values["volume_sma"] - 1,
+        })
+    return pd.DataFrame(features, index=data.index).replace([np.inf, -np.inf], np.nan)
+
+# Function to build the training targets
+def build_targets(data, days=7):
+    """Return from each close to the close 1..days bars later, one column per horizon"""
+    close = data["Close"].to_numpy(dtype=float)
+    targets = {}
+    for horizon in range(1, days + 1):
+        future = np.concatenate((close[horizon:], np.full(horizon, np.nan)))
+        targets[f"return_{horizon}d"] = future / close - 1
+    return pd.DataFrame(targets, index=data.index)
+
+# Function to create an untrained model
+def make_model(name="random_forest", n_jobs=None, random_state=0):
+    """Build a multi-horizon regressor; n_jobs parallelises tree fitting (or the horizons for boosting)"""
+    if name not in MODELS:
+        raise ValueError(f"Unknown model '{name}', choose from {', '.join(MODELS)}")
+    return MODELS[name](n_jobs, random_state)
+
+# Function to train a model on one history
+def train(data, model="random_forest", days=7, lags=5, n_jobs=None, period=TRAINING_PERIOD):
+    """Fit a model predicting the next `days` returns and return its record; period labels the training window"""
+    features = build_features(data, lags)
+    targets = build_targets(data, days)
+    usable = features.notna().all(axis=1) & targets.notna().all(axis=1)
+    if usable.sum() < 2 * (features.shape[1] + days):
+        raise ValueError("Not enough price history to train a forecasting model")
+    estimator = make_model(model, n_jobs)
+    estimator.fit(features[usable].to_numpy(), targets[usable].to_numpy())
+    return {
+        "model": model,
+        "estimator": estimator,
+        "features": list(features.columns),
+        "days": days,
+        "lags": lags,
+        "period": period,
+        "trained_through": data.index[-1],
+        "samples": int(usable.sum()),
+    }
+
+# Function to build the on-disk path for a trained model
+def _model_path(ticker, model, days, lags, period):
+    return cache_path(ticker, f"{model}_{period}_{days}d_{lags}lags", MODEL_DIR, "joblib")
+
+# Function to load a trained model from disk
+def load_model(ticker, model="random_forest", days=7, lags=5, max_age=None, period=TRAINING_PERIOD):
+    """Return the stored model record if it exists and is younger than max_age, otherwise None"""
+    if max_age is None:
+        max_age = MODEL_TTL_SECONDS
+    # joblib is only imported once a model file is actually there to load
+    return read_file(_model_path(ticker, model, days, lags, period), max_age, lambda path: joblib.load(path))
+
+# Function to save a trained model to disk
+def save_model(ticker, record):
+    path = _model_path(ticker, record["model"], record["days"], record["lags"], record["period"])
+    write_file(path, record, joblib.dump)
+
+# Function to build the key a model is trained and refreshed under
+def _model_key(ticker, model, days, lags):
+    return (ticker.upper(), "model", model, days, lags)
+
+# Function to train and store a model on the ticker's TRAINING_PERIOD history
+def train_model(ticker, model="random_forest", days=7, lags=5, n_jobs=None):
+    """Train, store and return a model; concurrent calls for the same model share one training run.
+
+    Uses at most TRAINING_JOBS cores by default.
+    """
+    if n_jobs is None:
+        n_jobs = TRAINING_JOBS
+    key = _model_key(ticker, model, days, lags)
+
+    def fit():
+        # Another session may have stored a fresh model while this one waited
+        stored = load_model(ticker, model, days, lags)
+        if stored is not None:
+            return stored
+        try:
+            data, _ = get_history(ticker, TRAINING_PERIOD)
+            trained = train(data, model, days, lags, n_jobs)
+        except Exception as e:
+            _training_errors[key] = str(e)
+            raise
+        _training_errors.pop(key, None)
+        save_model(ticker, trained)
+        return trained
+
+    return single_flight(key, fit)
+
+# Function to get a trained model using stale-while-revalidate
+def get_model(ticker, model="random_forest", days=7, lags=5, n_jobs=None, wait=True):
+    """Serve the stored model right away and retrain it in the background once it is older than MODEL_TTL_SECONDS.
+
+    Only a missing model is trained on the spot. With wait=False that
+    training runs in the background as well and None is returned until the
+    model is stored; if the last background training failed, its error is
+    raised instead (and the next call tries again).
+    """
+    key = _model_key(ticker, model, days, lags)
+    record = load_model(ticker, model, days, lags, max_age=float("inf"))
+    if record is not None:
+        if not is_file_fresh(_model_path(ticker, model, days, lags, TRAINING_PERIOD), MODEL_TTL_SECONDS):
+            refresh_in_background(key, train_model, ticker, model, days, lags, n_jobs)
+        return record
+    if wait:
+        return train_model(ticker, model, days, lags, n_jobs)
+    error = _training_errors.pop(key, None)
+    if error is not None and not is_refreshing(key):
+        raise ValueError(error)
+    refresh_in_background(key, train_model, ticker, model, days, lags, n_jobs)
+    return None
+
+# Function to check whether a model is being trained in the background
+def is_training(ticker, model="random_forest", days=7, lags=5):
+    return is_refreshing(_model_key(ticker, model, days, lags))
+
+# Function to train and store models for many tickers in parallel
+def train_many(tickers, model="random_forest", days=7, lags=5, n_jobs=-1):
+    """Fetch TRAINING_PERIOD history for each ticker, then train and store one model per ticker across n_jobs processes.
+
+    Returns ({ticker: record}, {ticker: error}). Each model is fitted
+    single-threaded so the workers do not oversubscribe the cores.
+    """
+    def fit(ticker, data):
+        try:
+            record = train(data, model, days, lags, n_jobs=1)
+        except Exception as e:
+            return ticker, None, str(e)
+        return ticker, record, None
+
+    panel, failed = get_history_batch(tickers, TRAINING_PERIOD)
+    histories = {}
+    if not panel.empty:
+        for ticker in panel["Close"].columns:
+            histories[ticker] = panel.xs(ticker, axis=1, level=1).dropna(subset=["Close"])
+
+    records = {}
+    results = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(fit)(ticker, data) for ticker, data in histories.items()
+    )
+    for ticker, record, error in results:
+        if record is None:
+            failed[ticker] = error
+        else:
+            save_model(ticker, record)
+            records[ticker] = record
+    return records, failed
+
+# Function to forecast the next closes with a trained model
+def predict(record, data):
+    """Predicted closes for the next record["days"] days, from the latest bar's features"""
+    features = build_features(data, record["lags"])[record["features"]].iloc[[-1]]
+    if features.isna().any(axis=None):
+        raise ValueError("Not enough recent price history to forecast")
+    returns = record["estimator"].predict(features.to_numpy())[0]
+    last_close = float(data["Close"].iloc[-1])
+    dates = pd.date_range(start=data.index[-1] + pd.Timedelta(days=1), periods=record["days"], freq="D")
+    return pd.Series(last_close * (1 + returns), index=dates, name=record["model"])
+
+# Function to forecast a ticker with a stored (or freshly trained) model
+def ml_forecast(ticker, model="random_forest", days=7, lags=5, n_jobs=None, wait=True):
+    """Forecast from the TRAINING_PERIOD history, so the estimate does not depend on the period on screen.
+
+    With wait=False a missing model is trained in the background and None is returned meanwhile.
+    """
+    record = get_model(ticker, model, days, lags, n_jobs, wait)
+    if record is None:
+        return None
+    data, _ = get_history(ticker, TRAINING_PERIOD)
+    return predict(record, data)
@@ -0,0 +1,231 @@
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from rate_limiter import provider_limiter
+from data_cache import PERIOD_OFFSETS, FUNDAMENTAL_TTLS
+from lazy_imports import lazy_import
+
+# yfinance is imported on the first Yahoo request, so the local provider never loads it
+yf = lazy_import("yfinance")
+
+# Which provider the app uses: "yfinance" (default) or "local"
+PROVIDER_NAME = os.environ.get("STOCK_DATA_PROVIDER", "yfinance")
+
+# Local provider settings: fixture folder (CSV/Parquet per ticker) and simulated latency in seconds
+FIXTURES_DIR = os.environ.get("STOCK_FIXTURES_DIR", "")
+PROVIDER_LATENCY = float(os.environ.get("STOCK_PROVIDER_LATENCY", 0))
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+
+class MarketDataProvider(ABC):
+    """Source of OHLCV history and company info used by market_data.
+
+    history() takes either a yfinance-style period ("1y", "max") or a start
+    date and returns a frame with OHLCV_COLUMNS. download() fetches several
+    tickers in one request and returns {ticker: frame} for those with data.
+    quote() returns the price-driven fields (market cap) from a call lighter
+    than info(). Subclasses must implement history() and info(); download()
+    falls back to one history() call per ticker and quote() to info().
+    """
+
+    @abstractmethod
+    def history(self, ticker, period=None, start=None):
+        ...
+
+    @abstractmethod
+    def info(self, ticker):
+        ...
+
+    def quote(self, ticker):
+        return self.info(ticker)
+
+    def download(self, tickers, period=None, start=None):
+        frames = {}
+        for ticker in tickers:
+            frame = self.history(ticker, period=period, start=start)
+            if frame is not None and not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance via yfinance; every call goes through the shared rate limiter"""
+
+    def history(self, ticker, period=None, start=None):
+        provider_limiter.acquire()
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start)
+        return yf.Ticker(ticker).history(period=period)
+
+    def info(self, ticker):
+        provider_limiter.acquire()
+        return yf.Ticker(ticker).info
+
+    def quote(self, ticker):
+        # fast_info derives market cap from the share count and last price, skipping the quoteSummary call
+        provider_limiter.acquire()
+        return {"marketCap": yf.Ticker(ticker).fast_info.market_cap}
+
+    def download(self, tickers, period=None, start=None):
+        # yfinance requests each ticker separately, so a group costs one token per ticker
+        provider_limiter.acquire(len(tickers))
+        if start is not None:
+            raw = yf.download(
+                tickers, start=start, group_by="ticker",
+                actions=True, threads=False, progress=False,
+            )
+        else:
+            raw = yf.download(
+                tickers, period=period, group_by="ticker",
+                actions=True, threads=False, progress=False,
+            )
+        frames = {}
+        if raw is None or raw.empty:
+            return frames
+        for ticker in tickers:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if ticker not in raw.columns.get_level_values(0):
+                    continue
+                frame = raw[ticker]
+            else:
+                frame = raw
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+class LocalProvider(MarketDataProvider):
+    """Offline stand-in serving fixtures from disk or a deterministic synthetic series.
+
+    A ticker is read from <fixtures_dir>/<TICKER>.parquet or .csv when present,
+    otherwise a seeded random walk is generated for it. Every call sleeps for
+    `latency` seconds to mimic a network round trip, so app throughput can be
+    measured without touching Yahoo.
+    """
+
+    def __init__(self, fixtures_dir=None, latency=0.0, days=2520, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.days = days
+        self.seed = seed
+        self._series = {}
+        self._index = None
+        self._index_date = None
+
+    def _load(self, ticker):
+        if ticker not in self._series:
+            data = self._read_fixture(ticker)
+            if data is None:
+                data = self._synthetic(ticker)
+            self._series[ticker] = data
+        return self._series[ticker]
+
+    def _read_fixture(self, ticker):
+        if not self.fixtures_dir:
+            return None
+        parquet_path = os.path.join(self.fixtures_dir, f"{ticker}.parquet")
+        csv_path = os.path.join(self.fixtures_dir, f"{ticker}.csv")
+        if os.path.exists(parquet_path):
+            data = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            data = pd.read_csv(csv_path, index_col=0)
+            data.index = pd.to_datetime(data.index, utc=True).tz_convert("America/New_York")
+        else:
+            return None
+        for column in ("Dividends", "Stock Splits"):
+            if column not in data.columns:
+                data[column] = 0.0
+        return data.sort_index()
+
+    def _synthetic(self, ticker):
+        days = self.days
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()) ^ self.seed)
+        # Every synthetic ticker shares one business-day calendar; building it is the slow part
+        today = pd.Timestamp.today().normalize()
+        if self._index is None or self._index_date != today:
+            self._index = pd.bdate_range(end=today, periods=days, tz="America/New_York")
+            self._index_date = today
+        index = self._index
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+        open_ = close * (1 + rng.normal(0, 0.005, days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, days)))
+        return pd.DataFrame({
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, days),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=index)
+
+    def _slice(self, ticker, period=None, start=None):
+        data = self._load(ticker.upper())
+        if start is not None:
+            start = pd.Timestamp(start)
+            if data.index.tz is not None and start.tz is None:
+                start = start.tz_localize(data.index.tz)
+            return data[data.index >= start].copy()
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None:
+            return data.copy()
+        return data[data.index >= data.index[-1] - offset].copy()
+
+    def history(self, ticker, period=None, start=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._slice(ticker, period, start)
+
+    def info(self, ticker):
+        if self.latency:
+            time.sleep(self.latency)
+        ticker = ticker.upper()
+        info = {field: "N/A" for field in FUNDAMENTAL_TTLS}
+        info.update({
+            "longName": f"{ticker} (local data)",
+            "currency": "USD",
+            "marketCap": float(self._load(ticker)["Close"].iloc[-1] * 1e9),
+            "website": "",
+            "longBusinessSummary": f"Offline data for {ticker} served by the local provider.",
+        })
+        return info
+
+    def quote(self, ticker):
+        if self.latency:
+            time.sleep(self.latency)
+        return {"marketCap": float(self._load(ticker.upper())["Close"].iloc[-1] * 1e9)}
+
+    def download(self, tickers, period=None, start=None):
+        # A grouped request pays one round trip, not one per ticker
+        if self.latency:
+            time.sleep(self.latency)
+        frames = {}
+        for ticker in tickers:
+            frame = self._slice(ticker, period, start)
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+_provider = None
+
+# Function to get the provider every data call goes through
+def get_provider():
+    global _provider
+    if _provider is None:
+        if PROVIDER_NAME == "local":
+            _provider = LocalProvider(FIXTURES_DIR or None, PROVIDER_LATENCY)
+        else:
+            _provider = YFinanceProvider()
+    return _provider
+
+# Function to swap the provider, e.g. for benchmarks and load tests
+def set_provider(provider):
+    global _provider
+    _provider = provider
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+# Sustained provider calls per second (0 disables limiting) and the burst size allowed on top
+PROVIDER_RATE = float(os.environ.get("STOCK_RATE_LIMIT", 2))
+PROVIDER_BURST = float(os.environ.get("STOCK_RATE_BURST", 5))
+
+
+class TokenBucket:
+    """Token-bucket limiter allowing `rate` calls per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._max_waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, take them and return the seconds waited.
+
+        A request larger than the bucket waits for a full bucket and leaves it
+        in debt, so large batch calls still average out to the configured rate.
+        """
+        if self.rate <= 0:
+            return 0.0
+        start = time.monotonic()
+        needed = min(tokens, self.capacity)
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            while True:
+                with self._lock:
+                    self._refill(time.monotonic())
+                    if self._tokens >= needed:
+                        self._tokens -= tokens
+                        break
+                    delay = (needed - self._tokens) / self.rate
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        waited = time.monotonic() - start
+        with self._lock:
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def metrics(self):
+        """Snapshot of queue depth, wait times and remaining tokens"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_waiting,
+                "acquired": self._acquired,
+                "avg_wait_seconds": self._total_wait / self._acquired if self._acquired else 0.0,
+                "max_wait_seconds": self._max_wait,
+                "total_wait_seconds": self._total_wait,
+                "tokens_available": self._tokens,
+            }
+
+
+# Shared limiter that every provider call goes through
+provider_limiter = TokenBucket(PROVIDER_RATE, PROVIDER_BURST)
@@ -0,0 +1,191 @@
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from indicators import compute_panel, default_outputs, warmup_bars
+from market_data import get_history_batch
+from data_cache import COMPACT_MODE, slice_period
+
+# Price fields handed to the workers, in shared-memory order
+SCREEN_FIELDS = ("Close", "High", "Low", "Volume")
+
+
+class ScreenResult:
+    """Indicator panels for a screened universe plus throughput figures"""
+
+    __slots__ = ("indicators", "failed", "stats")
+
+    def __init__(self, indicators, failed, stats):
+        self.indicators = indicators
+        self.failed = failed
+        self.stats = stats
+
+    def latest(self):
+        """Last available value of every indicator, one row per ticker"""
+        return pd.DataFrame({
+            name: frame.ffill().iloc[-1] for name, frame in self.indicators.items()
+        })
+
+
+# Function to open a shared memory block created by the parent process
+def _attach(name):
+    # Pool workers share the parent's resource tracker, which already owns the
+    # block; 3.13+ can skip registering it a second time
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+# Function run in each worker: compute one shard of ticker columns
+def _screen_shard(prices_name, results_name, prices_shape, results_shape, dtype, fields, outputs, start, stop):
+    prices_block = _attach(prices_name)
+    results_block = _attach(results_name)
+    try:
+        prices = np.ndarray(prices_shape, dtype=dtype, buffer=prices_block.buf)
+        results = np.ndarray(results_shape, dtype=dtype, buffer=results_block.buf)
+        shard = {field: prices[i, :, start:stop] for i, field in enumerate(fields)}
+        computed = compute_panel(shard, outputs)
+        for i, name in enumerate(outputs):
+            results[i, :, start:stop] = computed[name]
+        del prices, results, shard
+    finally:
+        prices_block.close()
+        results_block.close()
+    return stop - start
+
+# Function to screen a whole ticker universe across every core
+def screen(tickers=None, period="1y", outputs=None, workers=None, shard_size=None, panel=None, compact=None):
+    """Compute indicators for a large universe in a process pool.
+
+    Prices come from market_data.get_history_batch (or a ready-made
+    (field, ticker) panel, used as given) and are copied once into a shared
+    memory block. Fetched histories are padded with enough earlier bars to
+    warm up every output, and results are trimmed back to the period.
+    Each worker reads its shard of ticker columns from the block, runs the panel
+    indicator engine and writes into a shared result block, so no
+    DataFrames are pickled between processes. compact (default:
+    STOCK_COMPACT) keeps both blocks and the results in float32, halving
+    their memory; volume is then exact up to 2**24 shares per bar and
+    accurate to about 1e-7 relative above that.
+    """
+    if outputs is None:
+        outputs = default_outputs()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if compact is None:
+        compact = COMPACT_MODE
+    dtype = np.dtype(np.float32 if compact else np.float64)
+
+    started = time.perf_counter()
+    failed = {}
+    fetched = panel is None
+    if fetched:
+        panel, failed = get_history_batch(tickers, period, warmup=warmup_bars(outputs), compact=compact)
+    loaded = time.perf_counter()
+    if panel.empty:
+        return ScreenResult({}, failed, {"tickers": 0, "failed": len(failed)})
+
+    index = panel.index
+    columns = panel["Close"].columns
+    fields = tuple(f for f in SCREEN_FIELDS if f in panel.columns.get_level_values(0))
+    prices_shape = (len(fields), len(index), len(columns))
+    results_shape = (len(outputs), len(index), len(columns))
+
+    prices_block = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * math.prod(prices_shape), 1))
+    results_block = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * math.prod(results_shape), 1))
+    try:
+        prices = np.ndarray(prices_shape, dtype=dtype, buffer=prices_block.buf)
+        for i, field in enumerate(fields):
+            prices[i] = panel[field].reindex(columns=columns).to_numpy(dtype=dtype)
+        results = np.ndarray(results_shape, dtype=dtype, buffer=results_block.buf)
+
+        if shard_size is None:
+            # A few shards per worker keeps the pool balanced when columns differ in length
+            shard_size = max(1, math.ceil(len(columns) / (workers * 4)))
+        bounds = [(i, min(i + shard_size, len(columns))) for i in range(0, len(columns), shard_size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [
+                pool.submit(
+                    _screen_shard, prices_block.name, results_block.name,
+                    prices_shape, results_shape, dtype.str, fields, outputs, start, stop,
+                )
+                for start, stop in bounds
+            ]
+            for job in jobs:
+                job.result()
+        computed = time.perf_counter()
+
+        indicators = {}
+        for i, name in enumerate(outputs):
+            frame = pd.DataFrame(results[i], index=index, columns=columns)
+            # Drop the warm-up bars so every indicator starts on the period's first day
+            indicators[name] = (slice_period(frame, period) if fetched else frame).copy()
+        del prices, results
+    finally:
+        prices_block.close()
+        prices_block.unlink()
+        results_block.close()
+        results_block.unlink()
+
+    compute_seconds = computed - loaded
+    total_seconds = time.perf_counter() - started
+    stats = {
+        "tickers": len(columns),
+        "failed": len(failed),
+        "workers": workers,
+        "shards": len(bounds),
+        "load_seconds": loaded - started,
+        "compute_seconds": compute_seconds,
+        "total_seconds": total_seconds,
+        "tickers_per_second": len(columns) / compute_seconds if compute_seconds > 0 else float("inf"),
+        "overall_tickers_per_second": len(columns) / total_seconds if total_seconds > 0 else float("inf"),
+    }
+    return ScreenResult(indicators, failed, stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a ticker universe with the indicator engine")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to screen")
+    parser.add_argument("--file", help="File with one ticker per line")
+    parser.add_argument("--period", default="1y", help="History period (default: 1y)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write the latest indicator values to this CSV file")
+    parser.add_argument("--compact", action="store_true", help="Keep prices and indicators in float32")
+    args = parser.parse_args(argv)
+
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers += [line.strip() for line in f if line.strip()]
+    if not tickers:
+        parser.error("no tickers given")
+
+    result = screen(tickers, args.period, workers=args.workers, compact=args.compact or None)
+    stats = result.stats
+    print(
+        f"Screened {stats['tickers']} tickers ({stats['failed']} failed) "
+        f"on {stats.get('workers', 0)} workers"
+    )
+    if stats["tickers"]:
+        print(
+            f"Indicators: {stats['compute_seconds']:.2f}s "
+            f"({stats['tickers_per_second']:.0f} tickers/second); "
+            f"including data load: {stats['total_seconds']:.2f}s "
+            f"({stats['overall_tickers_per_second']:.0f} tickers/second)"
+        )
+        latest = result.latest()
+        if args.output:
+            latest.to_csv(args.output)
+        else:
+            print(latest.to_string())
+    for ticker, error in result.failed.items():
+        print(f"Failed {ticker}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import math
+from collections import deque
+import numpy as np
+
+NAN = float("nan")
+
+
+class RollingMean:
+    """Mean of the last `window` values, updated in O(1) per value.
+
+    Matches indicators.rolling_mean: NaN until the window is full or while a
+    NaN is inside it. The running sum is rebuilt from the buffer once per
+    window of updates so floating-point drift cannot accumulate.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._buffer = deque()
+        self._sum = 0.0
+        self._nans = 0
+        self._since_resync = 0
+        self.value = NAN
+
+    def update(self, x):
+        if len(self._buffer) == self.window:
+            old = self._buffer.popleft()
+            if old != old:
+                self._nans -= 1
+            else:
+                self._sum -= old
+        self._buffer.append(x)
+        if x != x:
+            self._nans += 1
+        else:
+            self._sum += x
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._sum = math.fsum(v for v in self._buffer if v == v)
+            self._since_resync = 0
+        full = len(self._buffer) == self.window and self._nans == 0
+        self.value = self._sum / self.window if full else NAN
+        return self.value
+
+
+class RollingStd:
+    """Sample (ddof=1) standard deviation of the last `window` values, updated in O(1).
+
+    Uses Welford's add/remove updates for the mean and sum of squared
+    deviations, re-deriving both from the buffer once per window of updates.
+    Matches indicators.rolling_std to floating-point precision.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._buffer = deque()
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._nans = 0
+        self._since_resync = 0
+        self.mean = NAN
+        self.value = NAN
+
+    def _add(self, x):
+        self._count += 1
+        delta = x - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x):
+        self._count -= 1
+        if self._count == 0:
+            self._mean = self._m2 = 0.0
+            return
+        delta = x - self._mean
+        self._mean -= delta / self._count
+        self._m2 -= delta * (x - self._mean)
+
+    def _resync(self):
+        values = [v for v in self._buffer if v == v]
+        self._count = len(values)
+        self._mean = math.fsum(values) / self._count if values else 0.0
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in values)
+        self._since_resync = 0
+
+    def update(self, x):
+        if len(self._buffer) == self.window:
+            old = self._buffer.popleft()
+            if old != old:
+                self._nans -= 1
+            else:
+                self._remove(old)
+        self._buffer.append(x)
+        if x != x:
+            self._nans += 1
+        else:
+            self._add(x)
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+        if len(self._buffer) == self.window and self._nans == 0 and self.window > 1:
+            self.mean = self._mean
+            self.value = math.sqrt(max(self._m2 / (self.window - 1), 0.0))
+        else:
+            self.mean = self.value = NAN
+        return self.value
+
+
+class EMA:
+    """Exponential moving average matching pandas ewm(span=span, adjust=False)"""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = NAN
+
+    def update(self, x):
+        if x == x:
+            if self.value != self.value:
+                self.value = x
+            else:
+                self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class MACD:
+    """MACD line, signal line and histogram updated one close at a time"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = self.signal = self.histogram = NAN
+
+    def update(self, close):
+        self.macd = self._fast.update(close) - self._slow.update(close)
+        self.signal = self._signal.update(self.macd)
+        self.histogram = self.macd - self.signal
+        return self.macd, self.signal
+
+
+class Bollinger:
+    """Middle, upper and lower Bollinger Bands from one rolling mean/std state"""
+
+    def __init__(self, window=20, num_std=2):
+        self.num_std = num_std
+        self._std = RollingStd(window)
+        self._mean = RollingMean(window)
+        self.middle = self.upper = self.lower = NAN
+
+    def update(self, close):
+        width = self.num_std * self._std.update(close)
+        self.middle = self._mean.update(close)
+        self.upper = self.middle + width
+        self.lower = self.middle - width
+        return self.middle, self.upper, self.lower
+
+
+class RSI:
+    """RSI from simple moving averages of gains and losses, as in indicators.rsi"""
+
+    def __init__(self, period=14):
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._prev = None
+        self.value = NAN
+
+    def update(self, close):
+        if self._prev is None:
+            self._prev = close
+            return self.value
+        delta = close - self._prev
+        self._prev = close
+        avg_gain = self._gain.update(max(delta, 0.0) if delta == delta else NAN)
+        avg_loss = self._loss.update(max(-delta, 0.0) if delta == delta else NAN)
+        if avg_gain != avg_gain or avg_loss != avg_loss:
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0 if avg_gain > 0 else 50.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return self.value
+
+
+class ATR:
+    """Average true range over `period` bars"""
+
+    def __init__(self, period=14):
+        self._mean = RollingMean(period)
+        self._prev_close = NAN
+        self.true_range = NAN
+        self.value = NAN
+
+    def update(self, high, low, close):
+        # fmax ignores the missing previous close on the first bar
+        self.true_range = float(np.fmax(
+            high - low, np.fmax(abs(high - self._prev_close), abs(low - self._prev_close))
+        ))
+        self._prev_close = close
+        self.value = self._mean.update(self.true_range)
+        return self.value
+
+
+class OBV:
+    """On-balance volume"""
+
+    def __init__(self):
+        self._prev_close = None
+        self.value = NAN
+
+    def update(self, close, volume):
+        # Like the batch version, OBV starts at 0 on the first bar with a close
+        if self.value != self.value and close == close:
+            self.value = 0.0
+        prev = self._prev_close
+        if prev is not None and close == close and prev == prev and close != prev:
+            self.value += volume if close > prev else -volume
+        self._prev_close = close
+        return self.value
+
+
+class ADX:
+    """ADX from simple moving averages of directional movement and true range"""
+
+    def __init__(self, period=14):
+        self._atr = ATR(period)
+        self._plus = RollingMean(period)
+        self._minus = RollingMean(period)
+        self._dx = RollingMean(period)
+        self._prev_high = self._prev_low = NAN
+        self.value = NAN
+
+    def update(self, high, low, close):
+        atr = self._atr.update(high, low, close)
+        up = high - self._prev_high
+        down = self._prev_low - low
+        self._prev_high, self._prev_low = high, low
+        if up != up or down != down:
+            plus_dm = minus_dm = NAN
+        else:
+            plus_dm = up if up > down and up > 0 else 0.0
+            minus_dm = down if down > up and down > 0 else 0.0
+        plus_avg = self._plus.update(plus_dm)
+        minus_avg = self._minus.update(minus_dm)
+        if atr != atr or plus_avg != plus_avg or minus_avg != minus_avg or atr == 0:
+            dx = NAN
+        else:
+            plus_di = 100.0 * plus_avg / atr
+            minus_di = 100.0 * minus_avg / atr
+            total = plus_di + minus_di
+            dx = 0.0 if total == 0 else 100.0 * abs(plus_di - minus_di) / total
+        self.value = self._dx.update(dx)
+        return self.value
+
+
+# Function to replay a history through an updater
+def replay(updater, *columns):
+    """Feed aligned columns bar by bar and return the updater's outputs as an array.
+
+    Useful to prime an updater from stored history before streaming new bars.
+    """
+    return np.array([updater.update(*bar) for bar in zip(*columns)])
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from indicators import ema
+
+# Default parameter grids
+RSI_WINDOWS = np.arange(5, 51)
+BOLLINGER_WINDOWS = np.arange(10, 41)
+BOLLINGER_STDS = np.arange(1.5, 3.01, 0.25)
+MACD_FAST = np.arange(5, 21)
+MACD_SLOW = np.arange(20, 61, 2)
+
+
+class SweepResult:
+    """Indicator outputs over a parameter grid for one price series.
+
+    Every output is an array of shape (time, *grid) with one axis per
+    parameter: dims names the axes and coords holds the parameter value
+    along each grid axis, e.g. result["upper"][:, i, j] is the upper band
+    for window coords["window"][i] and coords["num_std"][j].
+    """
+
+    __slots__ = ("index", "coords", "_outputs")
+
+    def __init__(self, index, coords, outputs):
+        self.index = index
+        self.coords = coords
+        self._outputs = outputs
+
+    @property
+    def dims(self):
+        return ("time",) + tuple(self.coords)
+
+    def __getitem__(self, name):
+        return self._outputs[name]
+
+    def outputs(self):
+        return list(self._outputs)
+
+    def sel(self, name, **params):
+        """Slice an output at the given parameter values, e.g. sel("rsi", window=14)"""
+        key = [slice(None)]
+        for dim, values in self.coords.items():
+            if dim not in params:
+                key.append(slice(None))
+                continue
+            position = np.flatnonzero(np.isclose(values, params[dim]))
+            if not len(position):
+                raise KeyError(f"{dim}={params[dim]} is not in the sweep")
+            key.append(position[0])
+        out = self._outputs[name][tuple(key)]
+        if out.ndim == 1 and self.index is not None:
+            return pd.Series(out, index=self.index, name=name)
+        return out
+
+    def to_frame(self, name):
+        """One output as a frame with a column per parameter combination"""
+        values = self._outputs[name]
+        columns = pd.MultiIndex.from_product(list(self.coords.values()), names=list(self.coords))
+        return pd.DataFrame(values.reshape(len(values), -1), index=self.index, columns=columns)
+
+
+# Function to split a price series into values and index
+def _close_values(close):
+    index = close.index if hasattr(close, "index") else None
+    if hasattr(close, "to_numpy"):
+        close = close.to_numpy(dtype=float)
+    return np.asarray(close, dtype=float), index
+
+# Function to compute trailing-window sums for many windows from one cumulative sum
+def _window_sums(values, windows):
+    """Sums and valid counts over the last w values for every w, as (time x window) arrays"""
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    end = np.arange(1, len(values) + 1)[:, None]
+    start = end - windows[None, :]
+    # Rows before a window fills read past the start; they are masked out below
+    start = np.clip(start, 0, None)
+    full = (counts[end] - counts[start]) == windows[None, :]
+    full &= end >= windows[None, :]
+    return sums[end] - sums[start], full
+
+# Function to compute rolling means for many windows at once
+def _rolling_means(values, windows):
+    """Matches indicators.rolling_mean for every window; windows on the last axis"""
+    sums, full = _window_sums(values, windows)
+    return np.where(full, sums / windows, np.nan)
+
+# Function to compute rolling sample standard deviations for many windows at once
+def _rolling_stds(values, windows):
+    """Matches indicators.rolling_std for every window; windows on the last axis"""
+    valid = ~np.isnan(values)
+    # Shift by the first value so the sum of squares does not lose precision
+    shifted = values - (values[valid][0] if valid.any() else 0.0)
+    sums, full = _window_sums(shifted, windows)
+    squares, _ = _window_sums(shifted * shifted, windows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.maximum((squares - sums * sums / windows) / (windows - 1), 0.0)
+    return np.where(full & (windows > 1), np.sqrt(variance), np.nan)
+
+# Function to compute RSI for a grid of periods
+def rsi_sweep(close, windows=RSI_WINDOWS):
+    """RSI for every period in one pass; output "rsi" is (time x window)"""
+    values, index = _close_values(close)
+    windows = np.asarray(windows, dtype=int)
+    delta = np.concatenate(([np.nan], np.diff(values)))
+    avg_gain = _rolling_means(np.clip(delta, 0.0, None), windows)
+    avg_loss = _rolling_means(np.clip(-delta, 0.0, None), windows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), out)
+    out = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, out)
+    return SweepResult(index, {"window": windows}, {"rsi": out})
+
+# Function to compute Bollinger Bands for a grid of windows and widths
+def bollinger_sweep(close, windows=BOLLINGER_WINDOWS, num_stds=BOLLINGER_STDS):
+    """Bands for every (window, num_std) pair; "middle" is (time x window), "upper"/"lower" are (time x window x num_std)"""
+    values, index = _close_values(close)
+    windows = np.asarray(windows, dtype=int)
+    num_stds = np.asarray(num_stds, dtype=float)
+    middle = _rolling_means(values, windows)
+    width = _rolling_stds(values, windows)[:, :, None] * num_stds[None, None, :]
+    outputs = {
+        "middle": np.broadcast_to(middle[:, :, None], width.shape),
+        "upper": middle[:, :, None] + width,
+        "lower": middle[:, :, None] - width,
+    }
+    return SweepResult(index, {"window": windows, "num_std": num_stds}, outputs)
+
+# Function to compute MACD for a grid of fast and slow spans
+def macd_sweep(close, fast=MACD_FAST, slow=MACD_SLOW, signal=9):
+    """MACD, signal line and histogram for every (fast, slow) pair, each (time x fast x slow).
+
+    Each distinct span's EMA is computed once, all spans stepping through
+    time together; pairs with fast >= slow are NaN.
+    """
+    values, index = _close_values(close)
+    fast = np.asarray(fast, dtype=int)
+    slow = np.asarray(slow, dtype=int)
+    spans, position = np.unique(np.concatenate((fast, slow)), return_inverse=True)
+    emas = ema(np.repeat(values[:, None], len(spans), axis=1), spans)
+    fast_ema = emas[:, position[:len(fast)]]
+    slow_ema = emas[:, position[len(fast):]]
+    line = fast_ema[:, :, None] - slow_ema[:, None, :]
+    line[:, fast[:, None] >= slow[None, :]] = np.nan
+    signal_line = ema(line.reshape(len(values), -1), signal).reshape(line.shape)
+    outputs = {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+    return SweepResult(index, {"fast": fast, "slow": slow}, outputs)
@@ -0,0 +1,61 @@
+import os
+import sys
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import data_cache
+import providers
+from providers import LocalProvider
+
+
+class RecordingProvider(LocalProvider):
+    """LocalProvider that records every call as (method, ticker(s), period, start)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def history(self, ticker, period=None, start=None):
+        self.calls.append(("history", ticker, period, start))
+        return super().history(ticker, period, start)
+
+    def info(self, ticker):
+        self.calls.append(("info", ticker, None, None))
+        return super().info(ticker)
+
+    def quote(self, ticker):
+        self.calls.append(("quote", ticker, None, None))
+        return super().quote(ticker)
+
+    def download(self, tickers, period=None, start=None):
+        self.calls.append(("download", tuple(tickers), period, start))
+        return super().download(tickers, period, start)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the on-disk cache at an empty temporary folder"""
+    monkeypatch.setattr(data_cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def provider(cache_dir):
+    """Serve every market_data call from a recording local provider"""
+    previous = providers._provider
+    recording = RecordingProvider(days=600)
+    providers.set_provider(recording)
+    yield recording
+    providers.set_provider(previous)
+
+
+@pytest.fixture(scope="module")
+def history():
+    """600 synthetic bars with a gap in the closes, which exercises the NaN handling of every kernel"""
+    data = LocalProvider(days=600).history("AAPL")
+    data.iloc[300:303, data.columns.get_loc("Close")] = np.nan
+    return data
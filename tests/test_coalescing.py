@@ -0,0 +1,76 @@
+"""Single-flight coalescing of concurrent identical requests"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import market_data
+from coalescing import single_flight
+
+
+# Function to call single_flight from many threads at the same moment
+def call_together(threads, key, fetch):
+    barrier = threading.Barrier(threads)
+
+    def call():
+        barrier.wait()
+        return single_flight(key, fetch)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(call) for _ in range(threads)]
+    return futures
+
+
+def test_concurrent_callers_share_one_fetch():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = [future.result() for future in call_together(20, ("AAA", "max"), fetch)]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_error_reaches_every_waiter_and_frees_the_key():
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("provider down")
+
+    for future in call_together(5, ("AAA", "max"), fail):
+        with pytest.raises(ValueError, match="provider down"):
+            future.result()
+    # The next request starts a new fetch instead of reusing the failure
+    assert single_flight(("AAA", "max"), lambda: "ok") == "ok"
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "slow"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        blocked = pool.submit(single_flight, ("AAA", "max"), slow)
+        assert single_flight(("BBB", "max"), lambda: "fast") == "fast"
+        release.set()
+        assert blocked.result() == "slow"
+
+
+def test_concurrent_cold_sessions_make_one_provider_call(provider):
+    provider.latency = 0.2
+    barrier = threading.Barrier(10)
+
+    def session():
+        barrier.wait()
+        data, _ = market_data.get_history("AAA", "1y")
+        return data
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = [future.result() for future in [pool.submit(session) for _ in range(10)]]
+    assert provider.calls == [("history", "AAA", "max", None)]
+    assert all(len(data) == len(results[0]) for data in results)
@@ -0,0 +1,115 @@
+"""Pure cache helpers of data_cache: merging deltas, slicing periods and compact storage"""
+import numpy as np
+import pandas as pd
+
+import data_cache
+from providers import LocalProvider
+
+
+def test_merge_history_appends_new_bars_and_replaces_the_last_one():
+    full = LocalProvider(days=300).history("AAA")
+    cached = full.iloc[:-5].copy()
+    # The cached tail was a partial session; the delta re-requests it with its final values
+    cached.iloc[-1, cached.columns.get_loc("Close")] = -1.0
+    merged = data_cache.merge_history(cached, full.iloc[-6:], "max")
+    pd.testing.assert_frame_equal(merged, full, check_freq=False)
+
+
+def test_merge_history_trims_to_the_period_and_aligns_time_zones():
+    full = LocalProvider(days=600).history("AAA")
+    cached = full.iloc[:-10]
+    # Batch downloads come back with naive timestamps
+    delta = full.iloc[-11:].tz_localize(None)
+    merged = data_cache.merge_history(cached, delta, "1y")
+    assert merged.index.tz == full.index.tz
+    assert merged.index[-1] == full.index[-1]
+    expected = full[full.index >= full.index[-1] - pd.DateOffset(years=1)]
+    pd.testing.assert_frame_equal(merged, expected, check_freq=False)
+
+
+def test_merge_history_without_delta_keeps_the_cache():
+    cached = LocalProvider(days=50).history("AAA")
+    assert data_cache.merge_history(cached, cached.iloc[0:0], "max") is cached
+
+
+def test_has_adjustments_only_counts_bars_after_the_cached_tail():
+    delta = LocalProvider(days=5).history("AAA")
+    tail = delta.index[0]
+    assert not data_cache.has_adjustments(delta, after=tail)
+
+    # A dividend on the re-requested tail is already in the cached prices
+    delta.loc[tail, "Dividends"] = 0.25
+    assert not data_cache.has_adjustments(delta, after=tail)
+    assert data_cache.has_adjustments(delta)
+    assert not data_cache.has_adjustments(delta.tz_localize(None), after=tail)
+
+    delta.loc[delta.index[2], "Stock Splits"] = 2.0
+    assert data_cache.has_adjustments(delta, after=tail)
+    assert data_cache.has_adjustments(delta.tz_localize(None), after=tail)
+
+
+def test_slice_period_is_a_view_of_the_trailing_period():
+    full = LocalProvider(days=600).history("AAA")
+    sliced = data_cache.slice_period(full, "1y")
+    assert sliced.index[0] == full.index[full.index.searchsorted(full.index[-1] - pd.DateOffset(years=1))]
+    assert sliced.index[-1] == full.index[-1]
+    assert np.shares_memory(sliced["Close"].to_numpy(), full["Close"].to_numpy())
+
+
+def test_slice_period_max_returns_a_new_frame():
+    full = LocalProvider(days=100).history("AAA")
+    sliced = data_cache.slice_period(full, "max")
+    assert sliced is not full
+    sliced["Extra"] = 1.0
+    assert "Extra" not in full.columns
+
+
+def test_source_period_keeps_one_full_series(monkeypatch):
+    monkeypatch.setattr(data_cache, "FETCH_FULL_HISTORY", True)
+    assert data_cache.source_period("1mo") == "max"
+    monkeypatch.setattr(data_cache, "FETCH_FULL_HISTORY", False)
+    assert data_cache.source_period("1mo") == "1mo"
+    assert data_cache.source_period("max") == "max"
+
+
+def test_slice_period_keeps_warmup_bars_when_available():
+    full = LocalProvider(days=600).history("AAA")
+    period = data_cache.slice_period(full, "3mo")
+    padded = data_cache.slice_period(full, "3mo", warmup=200)
+    assert len(padded) == len(period) + 200
+    assert padded.index[200] == period.index[0]
+    # Warm-up is cut short, not padded, when the history is too short
+    assert data_cache.slice_period(full, "2y", warmup=200).index[0] == full.index[0]
+
+
+def test_source_period_covers_the_warmup(monkeypatch):
+    monkeypatch.setattr(data_cache, "FETCH_FULL_HISTORY", False)
+    assert data_cache.source_period("1mo", warmup=0) == "1mo"
+    assert data_cache.source_period("1mo", warmup=15) == "3mo"
+    assert data_cache.source_period("1mo", warmup=200) == "1y"
+    assert data_cache.source_period("10y", warmup=200) == "max"
+
+
+def test_compact_history_shrinks_types_within_the_documented_bounds():
+    full = LocalProvider(days=600).history("AAA")
+    compact = data_cache.compact_history(full)
+    assert list(compact.columns) == data_cache.COMPACT_COLUMNS
+    assert (compact.dtypes[["Open", "High", "Low", "Close"]] == np.float32).all()
+    assert compact["Volume"].dtype == np.uint32
+    assert (compact["Volume"].to_numpy() == full["Volume"].to_numpy()).all()
+    error = np.abs(compact["Close"].to_numpy(dtype=float) / full["Close"].to_numpy() - 1)
+    assert error.max() <= 6e-8
+    assert compact.memory_usage().sum() < full.memory_usage().sum() / 2
+
+
+def test_compact_panel_keeps_ragged_volume_exact():
+    provider = LocalProvider(days=300)
+    frames = {"AAA": provider.history("AAA"), "BBB": provider.history("BBB").iloc[50:]}
+    panel = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    compact = data_cache.compact_history(panel)
+    assert set(compact.columns.get_level_values(0)) == set(data_cache.COMPACT_COLUMNS)
+    assert list(compact["Close"].columns) == ["AAA", "BBB"]
+    assert (compact["Close"].dtypes == np.float32).all()
+    # BBB's missing early bars leave NaN in volume, which uint32 cannot hold
+    assert (compact["Volume"].dtypes != np.uint32).all()
+    np.testing.assert_array_equal(compact["Volume"].to_numpy(dtype=float), panel["Volume"].to_numpy(dtype=float))
@@ -0,0 +1,96 @@
+"""The Monte Carlo forecast and the charts and metrics built from it"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+from forecast import forecast_batch, forecast_prices
+from providers import LocalProvider
+from utils import plot_simple_forecast, predict_next_days
+
+
+def test_one_forecast_feeds_both_chart_and_metrics():
+    data = LocalProvider(days=100).history("AAA")
+    result = forecast_prices(data, days=7, seed=1)
+    fig = plot_simple_forecast(data, "AAA", "USD", result)
+    traces = {trace.name: trace for trace in fig.data}
+    np.testing.assert_array_equal(traces["Forecast"].y, result.prices)
+    assert result.change_pct == (result.prices[-1] - result.last_price) / result.last_price * 100
+
+
+def test_seeded_forecasts_are_reproducible():
+    data = LocalProvider(days=100).history("AAA")
+    first = forecast_prices(data, seed=7)
+    np.testing.assert_array_equal(first.paths, forecast_prices(data, seed=7).paths)
+    prices, volatility = predict_next_days(data, seed=7)
+    np.testing.assert_array_equal(prices, first.prices)
+    assert volatility == first.volatility
+
+
+def test_paths_are_clamped_and_summarised_by_percentile_bands():
+    data = LocalProvider(days=100).history("AAA")
+    result = forecast_prices(data, days=7, seed=3)
+    assert result.paths.shape == (forecast.SIMULATED_PATHS, 7)
+    # Every daily move, including the first one from the last close, stays within the clamp
+    prices = np.column_stack((np.full(len(result.paths), result.last_price), result.paths))
+    changes = prices[:, 1:] / prices[:, :-1] - 1
+    assert np.abs(changes).max() <= forecast.MAX_DAILY_CHANGE + 1e-12
+
+    low, high = forecast.BAND_PERCENTILES
+    np.testing.assert_allclose(result.prices, np.median(result.paths, axis=0))
+    np.testing.assert_allclose(result.lower, np.percentile(result.paths, low, axis=0))
+    np.testing.assert_allclose(result.upper, np.percentile(result.paths, high, axis=0))
+    assert (result.lower <= result.prices).all() and (result.prices <= result.upper).all()
+    np.testing.assert_allclose(result.percentiles(50), result.prices)
+
+
+def test_drift_and_volatility_come_from_the_lookback_window():
+    data = LocalProvider(days=100).history("AAA")
+    result = forecast_prices(data, seed=0)
+    changes = data["Close"].iloc[-forecast.LOOKBACK_DAYS:].pct_change().dropna()
+    assert result.drift == pytest.approx(changes.mean())
+    assert result.volatility == pytest.approx(changes.std())
+    assert result.last_price == data["Close"].iloc[-1]
+    assert result.dates[0] == data.index[-1] + np.timedelta64(1, "D")
+
+
+def test_too_little_history_is_rejected():
+    data = LocalProvider(days=1).history("AAA")
+    with pytest.raises(ValueError):
+        forecast_prices(data)
+
+
+def test_batch_forecast_matches_per_ticker_forecasts():
+    provider = LocalProvider(days=100)
+    frames = {ticker: provider.history(ticker) for ticker in ("AAA", "BBB", "CCC", "DDD")}
+    # Ragged: BBB stops early, CCC has a gap in its last month, DDD has a single close
+    frames["BBB"] = frames["BBB"].iloc[:-10]
+    frames["CCC"] = frames["CCC"].drop(frames["CCC"].index[-20:-15])
+    frames["DDD"] = frames["DDD"].iloc[-1:]
+    close = pd.DataFrame({ticker: frame["Close"] for ticker, frame in frames.items()})
+
+    batch = forecast_batch(close, days=7, seed=0, chunk_size=100_000)
+    assert list(batch.prices.columns) == list(close.columns)
+    assert batch.prices.index[0] == close.index[-1] + pd.Timedelta(days=1)
+    for ticker in ("AAA", "BBB", "CCC"):
+        single = forecast_prices(frames[ticker], days=7, seed=0)
+        assert batch.last_price[ticker] == single.last_price
+        assert batch.drift[ticker] == pytest.approx(single.drift)
+        assert batch.volatility[ticker] == pytest.approx(single.volatility)
+        # Independent simulations of the same model agree to Monte Carlo precision
+        np.testing.assert_allclose(batch.prices[ticker], single.prices, rtol=2e-3)
+        np.testing.assert_allclose(batch.upper[ticker], single.upper, rtol=5e-3)
+        np.testing.assert_allclose(batch.lower[ticker], single.lower, rtol=5e-3)
+    assert batch.prices["DDD"].isna().all()
+    assert batch.change_pct["AAA"] == pytest.approx(
+        (batch.prices["AAA"].iloc[-1] - batch.last_price["AAA"]) / batch.last_price["AAA"] * 100
+    )
+
+
+def test_batch_forecast_accepts_plain_arrays():
+    close = LocalProvider(days=60).history("AAA")["Close"].to_numpy()
+    batch = forecast_batch(np.column_stack((close, close * 2)), days=5, seed=0)
+    assert batch.dates is None
+    assert batch.prices.shape == (5, 2)
+    assert (batch.lower <= batch.prices).all() and (batch.prices <= batch.upper).all()
+    np.testing.assert_allclose(batch.volatility[0], batch.volatility[1])
@@ -0,0 +1,174 @@
+"""Caching, refresh and request coalescing behaviour of market_data"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import market_data
+from indicators import compute_indicators, warmup_bars
+
+
+# Function to cache a ticker's history without its last `missing` bars
+def seed_cache(provider, ticker, missing):
+    full = provider.history(ticker)
+    data_cache.save_history(ticker, "max", full.iloc[:-missing])
+    provider.calls.clear()
+    return full
+
+
+# Function to make a cache entry older than its TTL
+def make_stale(ticker, name="max"):
+    path = data_cache.cache_path(ticker, name)
+    old = time.time() - data_cache.CACHE_TTL_SECONDS - 60
+    os.utime(path, (old, old))
+
+
+# Function to wait for a background refresh to finish
+def wait_for_refresh(ticker, period=None, timeout=10):
+    deadline = time.time() + timeout
+    while market_data.is_refreshing(ticker, period) and time.time() < deadline:
+        time.sleep(0.01)
+    assert not market_data.is_refreshing(ticker, period)
+
+
+# Function to backdate one field of a cached fundamentals record
+def expire(ticker, field, seconds):
+    record = data_cache.load_fundamentals(ticker)
+    value, fetched_at = record[field]
+    record[field] = (value, fetched_at - seconds)
+    data_cache.save_fundamentals(ticker, record)
+    return record
+
+
+def test_expired_market_cap_uses_quote(provider):
+    fields, _ = market_data.get_fundamentals("AAA")
+    assert fields["longName"] == "AAA (local data)"
+    assert [call[0] for call in provider.calls] == ["info"]
+
+    before = expire("AAA", "marketCap", data_cache.FUNDAMENTAL_TTLS["marketCap"] + 60)
+    market_data.download_fundamentals("AAA")
+    assert [call[0] for call in provider.calls] == ["info", "quote"]
+
+    after = data_cache.load_fundamentals("AAA")
+    assert after["marketCap"][1] > before["marketCap"][1]
+    # Descriptive fields keep their original timestamps
+    for field in data_cache.FUNDAMENTAL_TTLS:
+        if field not in data_cache.QUOTE_FIELDS:
+            assert after[field] == before[field]
+    assert data_cache.stale_fields(after) == []
+
+
+def test_expired_descriptive_field_downloads_info(provider):
+    market_data.get_fundamentals("AAA")
+    expire("AAA", "longBusinessSummary", data_cache.FUNDAMENTAL_TTLS["longBusinessSummary"] + 60)
+    market_data.download_fundamentals("AAA")
+    assert [call[0] for call in provider.calls] == ["info", "info"]
+    assert data_cache.stale_fields(data_cache.load_fundamentals("AAA")) == []
+
+
+def test_fresh_fundamentals_make_no_call(provider):
+    market_data.get_fundamentals("AAA")
+    market_data.get_fundamentals("AAA")
+    market_data.download_fundamentals("AAA")
+    assert [call[0] for call in provider.calls] == ["info"]
+
+
+def test_refresh_downloads_only_bars_after_the_cached_tail(provider):
+    full = seed_cache(provider, "AAA", 5)
+    data = market_data.download_history("AAA", "max")
+    tail = full.index[-6].strftime("%Y-%m-%d")
+    assert provider.calls == [("history", "AAA", None, tail)]
+    pd.testing.assert_frame_equal(data, full, check_freq=False)
+    pd.testing.assert_frame_equal(data_cache.load_history("AAA", "max"), full, check_freq=False)
+
+
+def test_adjustment_after_the_tail_forces_a_full_download(provider):
+    full = seed_cache(provider, "AAA", 5)
+    full.loc[full.index[-2], "Dividends"] = 0.5
+    provider._series["AAA"] = full
+    market_data.download_history("AAA", "max")
+    assert [call[2:] for call in provider.calls] == [(None, full.index[-6].strftime("%Y-%m-%d")), ("max", None)]
+
+
+def test_adjustment_on_the_cached_tail_keeps_delta_refreshes(provider):
+    full = seed_cache(provider, "AAA", 5)
+    full.loc[full.index[-6], "Dividends"] = 0.5
+    provider._series["AAA"] = full
+    for _ in range(3):
+        market_data.download_history("AAA", "max")
+    assert all(call[2] is None for call in provider.calls)
+
+
+def test_switching_periods_makes_no_provider_call(provider):
+    full = provider.history("AAA")
+    provider.calls.clear()
+    for period in ["1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max"]:
+        data, updated = market_data.get_history("AAA", period)
+        expected = data_cache.slice_period(full, period)
+        pd.testing.assert_frame_equal(data, expected, check_freq=False)
+        assert updated is not None
+    assert provider.calls == [("history", "AAA", "max", None)]
+
+
+def test_stale_history_is_served_while_refreshing(provider):
+    full = seed_cache(provider, "AAA", 5)
+    make_stale("AAA")
+    provider.latency = 0.5
+
+    started = time.time()
+    data, updated = market_data.get_history("AAA", "max")
+    assert time.time() - started < provider.latency
+    assert data.index[-1] == full.index[-6]
+    assert market_data.is_refreshing("AAA", "max")
+
+    wait_for_refresh("AAA", "max")
+    assert len(provider.calls) == 1
+    data, refreshed = market_data.get_history("AAA", "max")
+    assert data.index[-1] == full.index[-1]
+    assert refreshed > updated
+
+
+def test_fresh_history_starts_no_refresh(provider):
+    seed_cache(provider, "AAA", 5)
+    market_data.get_history("AAA", "1y")
+    assert not market_data.is_refreshing("AAA", "1y")
+    assert provider.calls == []
+
+
+def test_stale_fundamentals_are_served_while_refreshing(provider):
+    market_data.get_fundamentals("AAA")
+    expire("AAA", "longBusinessSummary", data_cache.FUNDAMENTAL_TTLS["longBusinessSummary"] + 60)
+    provider.latency = 0.5
+
+    started = time.time()
+    fields, _ = market_data.get_fundamentals("AAA")
+    assert time.time() - started < provider.latency
+    assert fields["longName"] == "AAA (local data)"
+    wait_for_refresh("AAA")
+    assert [call[0] for call in provider.calls] == ["info", "info"]
+
+
+def test_warmup_comes_from_the_cached_series(provider):
+    market_data.get_history("AAA", "3mo")
+    warmup = warmup_bars()
+    padded, _ = market_data.get_history("AAA", "3mo", warmup=warmup)
+    assert len(provider.calls) == 1
+
+    data = data_cache.slice_period(padded, "3mo")
+    assert len(padded) == len(data) + warmup
+    moving_average = compute_indicators(padded)["200MA"][-len(data):]
+    assert not np.isnan(moving_average).any()
+
+
+def test_compact_history_leaves_the_cache_at_full_precision(provider):
+    data, _ = market_data.get_history("AAA", "1y", compact=True)
+    assert data["Close"].dtype == np.float32
+    assert "Dividends" not in data.columns
+    cached = data_cache.load_history("AAA", "max")
+    assert cached["Close"].dtype == np.float64
+    assert "Dividends" in cached.columns
+
+    panel, _ = market_data.get_history_batch(["AAA", "BBB"], "1y", compact=True)
+    assert (panel["Close"].dtypes == np.float32).all()
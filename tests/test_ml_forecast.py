@@ -0,0 +1,51 @@
+"""Model storage and background (re)training of ml_forecast"""
+import os
+import time
+
+import pytest
+
+import ml_forecast
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "models"
+    monkeypatch.setattr(ml_forecast, "MODEL_DIR", str(directory))
+    return directory
+
+
+# Function to wait for a background training run to finish
+def wait_for_training(ticker, model="linear", timeout=60):
+    deadline = time.time() + timeout
+    while ml_forecast.is_training(ticker, model) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not ml_forecast.is_training(ticker, model)
+
+
+def test_missing_model_trains_in_background(provider, model_dir):
+    assert ml_forecast.ml_forecast("AAA", "linear", wait=False) is None
+    wait_for_training("AAA")
+    record = ml_forecast.load_model("AAA", "linear")
+    assert record["period"] == ml_forecast.TRAINING_PERIOD
+    forecast = ml_forecast.ml_forecast("AAA", "linear", wait=False)
+    assert len(forecast) == 7 and forecast.notna().all()
+
+
+def test_stale_model_is_served_while_retraining(provider, model_dir):
+    first = ml_forecast.get_model("AAA", "linear")
+    path = ml_forecast._model_path("AAA", "linear", 7, 5, ml_forecast.TRAINING_PERIOD)
+    old = time.time() - ml_forecast.MODEL_TTL_SECONDS - 60
+    os.utime(path, (old, old))
+
+    served = ml_forecast.get_model("AAA", "linear", wait=False)
+    assert served["trained_through"] == first["trained_through"]
+    wait_for_training("AAA")
+    assert os.path.getmtime(path) > old
+
+
+def test_background_training_error_is_reported(provider, model_dir):
+    provider.days = 30
+    assert ml_forecast.get_model("TINY", "linear", wait=False) is None
+    wait_for_training("TINY")
+    with pytest.raises(ValueError, match="Not enough price history"):
+        ml_forecast.get_model("TINY", "linear", wait=False)
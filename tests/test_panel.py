@@ -0,0 +1,26 @@
+"""compute_panel on a ragged (time x ticker) panel must match per-ticker compute_indicators"""
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators, compute_panel
+from providers import LocalProvider
+
+
+def test_panel_matches_per_ticker():
+    provider = LocalProvider(days=400)
+    frames = {ticker: provider.history(ticker) for ticker in ("AAA", "BBB", "CCC")}
+    # Ragged histories: a late start, an early stop and missing dates
+    frames["AAA"] = frames["AAA"].iloc[120:]
+    frames["BBB"] = frames["BBB"].iloc[:-40]
+    frames["CCC"] = frames["CCC"].drop(frames["CCC"].index[200:215])
+    panel = pd.concat(frames, axis=1, sort=True).swaplevel(axis=1).sort_index(axis=1)
+
+    results = compute_panel(panel)
+    for ticker, frame in frames.items():
+        expected = compute_indicators(frame).columns()
+        for name, values in expected.items():
+            column = results[name][ticker]
+            np.testing.assert_array_equal(
+                column.loc[frame.index].to_numpy(), values, err_msg=f"{ticker} {name}"
+            )
+            assert column.drop(frame.index).isna().all()
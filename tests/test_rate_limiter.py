@@ -0,0 +1,70 @@
+"""Token-bucket limiting of provider calls"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+import providers
+from rate_limiter import TokenBucket
+
+
+def test_burst_is_free_then_calls_follow_the_rate():
+    bucket = TokenBucket(rate=20, capacity=5)
+    assert all(bucket.acquire() < 0.01 for _ in range(5))
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # Four more tokens at 20 per second take about 0.2 s
+    assert 0.15 < time.monotonic() - started < 0.5
+
+
+def test_zero_rate_disables_limiting():
+    bucket = TokenBucket(rate=0, capacity=1)
+    started = time.monotonic()
+    for _ in range(100):
+        assert bucket.acquire() == 0.0
+    assert time.monotonic() - started < 0.05
+
+
+def test_request_larger_than_the_bucket_leaves_it_in_debt():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire(6) < 0.01
+    assert bucket.metrics()["tokens_available"] < 0
+    # The next call waits until the debt is paid off: about (4 + 1) / 20 s
+    assert 0.2 < bucket.acquire() < 0.5
+
+
+def test_metrics_report_queue_depth_and_waits():
+    bucket = TokenBucket(rate=20, capacity=1)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics = bucket.metrics()
+    assert metrics["acquired"] == 5
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_queue_depth"] >= 2
+    assert metrics["max_wait_seconds"] >= 0.1
+    assert 0 < metrics["avg_wait_seconds"] <= metrics["max_wait_seconds"]
+
+
+def test_every_yfinance_call_takes_tokens(monkeypatch):
+    bucket = TokenBucket(rate=0.001, capacity=100)
+    frame = pd.DataFrame({"Close": [1.0]}, index=pd.to_datetime(["2024-01-02"]))
+    fake_ticker = SimpleNamespace(
+        history=lambda **kwargs: frame, info={}, fast_info=SimpleNamespace(market_cap=1.0),
+    )
+    fake_yf = SimpleNamespace(Ticker=lambda ticker: fake_ticker, download=lambda *args, **kwargs: frame)
+    monkeypatch.setattr(providers, "provider_limiter", bucket)
+    monkeypatch.setattr(providers, "yf", fake_yf)
+
+    provider = providers.YFinanceProvider()
+    provider.history("AAA", period="1y")
+    provider.info("AAA")
+    provider.quote("AAA")
+    provider.download(["AAA", "BBB", "CCC"], period="1y")
+    # One token per single-ticker call and one per ticker in a batch
+    assert bucket.metrics()["acquired"] == 4
+    assert round(bucket.metrics()["tokens_available"]) == 100 - 6
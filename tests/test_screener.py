@@ -0,0 +1,28 @@
+"""Screening a universe: warm-up padding, trimming and agreement with the panel engine"""
+import numpy as np
+
+from indicators import compute_panel
+from market_data import get_history_batch
+from screener import screen
+
+
+def test_screen_warms_up_and_trims_to_the_period(provider):
+    tickers = ["AAA", "BBB", "CCC"]
+    result = screen(tickers, "6mo", workers=2)
+    assert result.failed == {}
+    assert len(provider.calls) == 1
+
+    panel, _ = get_history_batch(tickers, "6mo")
+    for name, frame in result.indicators.items():
+        assert frame.index.equals(panel.index), name
+    # Every bar of the period has a 200-day average, thanks to the warm-up bars
+    assert not result.indicators["200MA"].isna().any(axis=None)
+
+
+def test_screen_uses_a_given_panel_as_is(provider):
+    panel, _ = get_history_batch(["AAA", "BBB"], "6mo")
+    result = screen(panel=panel, period="6mo", workers=2)
+    expected = compute_panel(panel)
+    for name, frame in result.indicators.items():
+        assert frame.index.equals(panel.index), name
+        np.testing.assert_allclose(frame.to_numpy(), expected[name].to_numpy(), rtol=1e-12, equal_nan=True)
@@ -0,0 +1,47 @@
+"""Streaming updaters replayed bar by bar must agree with the batch indicator kernels"""
+import numpy as np
+
+import indicators
+import streaming
+from indicators import compute_indicators
+
+
+def assert_same(actual, expected, atol=1e-9):
+    actual = np.asarray(actual, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=atol, equal_nan=True)
+
+
+def replay_fields(updater, data, fields, attribute=None):
+    columns = [data[field].to_numpy(dtype=float) for field in fields]
+    if attribute is None:
+        return streaming.replay(updater, *columns)
+    values = []
+    for bar in zip(*columns):
+        updater.update(*bar)
+        values.append(getattr(updater, attribute))
+    return np.array(values)
+
+
+def test_streaming_matches_batch(history):
+    batch = compute_indicators(history).columns()
+    close = ["Close"]
+    hlc = ["High", "Low", "Close"]
+    assert_same(replay_fields(streaming.RSI(14), history, close), batch["RSI"])
+    assert_same(replay_fields(streaming.RollingMean(50), history, close), batch["50MA"])
+    assert_same(replay_fields(streaming.EMA(12), history, close), batch["12EMA"])
+    assert_same(replay_fields(streaming.EMA(26), history, close), batch["26EMA"])
+    assert_same(replay_fields(streaming.Bollinger(20, 2), history, close, "middle"), batch["20MA"])
+    assert_same(replay_fields(streaming.Bollinger(20, 2), history, close, "upper"), batch["Upper Band"])
+    assert_same(replay_fields(streaming.Bollinger(20, 2), history, close, "lower"), batch["Lower Band"])
+    assert_same(replay_fields(streaming.MACD(12, 26, 9), history, close, "macd"), batch["MACD"])
+    assert_same(replay_fields(streaming.MACD(12, 26, 9), history, close, "signal"), batch["Signal Line"])
+    assert_same(replay_fields(streaming.ATR(14), history, hlc), batch["ATR"])
+    assert_same(replay_fields(streaming.ADX(14), history, hlc), batch["ADX"])
+    assert_same(replay_fields(streaming.OBV(), history, ["Close", "Volume"]), batch["OBV"])
+
+
+def test_streaming_std_matches_batch(history):
+    close = history["Close"]
+    assert_same(replay_fields(streaming.RollingStd(20), history, ["Close"]), indicators.rolling_std(close, 20))
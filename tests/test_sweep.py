@@ -0,0 +1,27 @@
+"""Sweep results sliced at one parameter set must match the single-parameter indicators"""
+import numpy as np
+
+import indicators
+import sweep
+
+
+def test_sweep_matches_single_parameter(history):
+    close = history["Close"]
+    rsi = sweep.rsi_sweep(close, windows=[5, 14, 30])
+    for window in (5, 14, 30):
+        np.testing.assert_array_equal(rsi.sel("rsi", window=window).to_numpy(), indicators.rsi(close, window))
+
+    bands = sweep.bollinger_sweep(close, windows=[10, 20], num_stds=[1.5, 2.0])
+    for window in (10, 20):
+        for num_std in (1.5, 2.0):
+            middle, upper, lower = indicators.bollinger(close, window, num_std)
+            np.testing.assert_array_equal(bands.sel("middle", window=window, num_std=num_std).to_numpy(), middle)
+            np.testing.assert_array_equal(bands.sel("upper", window=window, num_std=num_std).to_numpy(), upper)
+            np.testing.assert_array_equal(bands.sel("lower", window=window, num_std=num_std).to_numpy(), lower)
+
+    macd = sweep.macd_sweep(close, fast=[8, 12], slow=[26, 30], signal=9)
+    for fast in (8, 12):
+        for slow in (26, 30):
+            _, _, line, signal = indicators.macd(close, fast, slow, 9)
+            np.testing.assert_array_equal(macd.sel("macd", fast=fast, slow=slow).to_numpy(), line)
+            np.testing.assert_array_equal(macd.sel("signal", fast=fast, slow=slow).to_numpy(), signal)
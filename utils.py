@@ -1,8 +1,10 @@
-import plotly.graph_objs as go
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+import indicators
+from forecast import forecast_prices
+from lazy_imports import lazy_import
+
+# Plotly is imported when the first chart is drawn
+go = lazy_import("plotly.graph_objs")
 
 # Function to format market capitalization
 def format_market_cap(market_cap, currency):
@@ -94,53 +96,29 @@ def plot_volume(data, ticker):
 
 # Function to plot Average True Range (ATR)
 def plot_atr(data, ticker):
-    high_low = data['High'] - data['Low']
-    high_close = (data['High'] - data['Close'].shift()).abs()
-    low_close = (data['Low'] - data['Close'].shift()).abs()
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-    atr = true_range.rolling(window=14).mean()
-    
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index, y=atr, mode='lines', name='ATR'))
+    fig.add_trace(go.Scatter(x=data.index, y=data['ATR'], mode='lines', name='ATR'))
     fig.update_layout(title=f"{ticker} Average True Range (ATR)", xaxis_title="Date", yaxis_title="ATR")
     return fig
 
 # Function to plot OBV (On-Balance Volume)
 def plot_obv(data, ticker):
-    obv = (data['Volume'] * (data['Close'].diff() > 0).astype(int)).cumsum()
-    
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index, y=obv, mode='lines', name='OBV'))
+    fig.add_trace(go.Scatter(x=data.index, y=data['OBV'], mode='lines', name='OBV'))
     fig.update_layout(title=f"{ticker} On-Balance Volume (OBV)", xaxis_title="Date", yaxis_title="OBV")
     return fig
 
 # Function to plot ADX (Average Directional Index)
 def plot_adx(data, ticker):
-    plus_dm = data['High'].diff()
-    minus_dm = data['Low'].diff().abs()
-    tr = data[['High', 'Low', 'Close']].max(axis=1) - data[['High', 'Low', 'Close']].min(axis=1)
-    atr = tr.rolling(window=14).mean()
-    plus_di = 100 * (plus_dm.rolling(window=14).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=14).mean() / atr)
-    dx = 100 * (abs(plus_di - minus_di) / (plus_di + minus_di))
-    adx = dx.rolling(window=14).mean()
-
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index, y=adx, mode='lines', name='ADX'))
+    fig.add_trace(go.Scatter(x=data.index, y=data['ADX'], mode='lines', name='ADX'))
     fig.update_layout(title=f"{ticker} Average Directional Index (ADX)", xaxis_title="Date", yaxis_title="ADX")
     return fig
 
 def calculate_rsi(prices, period=14):
     """Calculate RSI with error handling"""
     try:
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        # Handle division by zero
-        rs = gain / loss.replace(0, float('inf'))
-        rsi = 100 - (100 / (1 + rs))
+        rsi = pd.Series(indicators.rsi(prices, period), index=prices.index)
         return rsi.fillna(50)  # Fill NaN values with neutral RSI
         
     except Exception as e:
@@ -149,55 +127,25 @@ def calculate_rsi(prices, period=14):
 
 def calculate_macd(prices):
     """Calculate MACD"""
-    exp1 = prices.ewm(span=12, adjust=False).mean()
-    exp2 = prices.ewm(span=26, adjust=False).mean()
-    return exp1 - exp2
+    _, _, macd_line, _ = indicators.macd(prices)
+    return pd.Series(macd_line, index=prices.index)
 
-def predict_next_days(data, days=7):
+def predict_next_days(data, days=7, seed=None):
     """Simple prediction for next few days based on recent trends"""
     try:
-        # Use last 30 days for trend analysis
-        recent_data = data[-30:].copy()
-        
-        # Calculate basic trend indicators
-        recent_data['SMA5'] = recent_data['Close'].rolling(window=5).mean()
-        recent_data['SMA20'] = recent_data['Close'].rolling(window=20).mean()
-        
-        # Calculate average daily change
-        daily_changes = recent_data['Close'].pct_change().dropna()
-        avg_daily_change = daily_changes.mean()
-        volatility = daily_changes.std()
-        
-        # Get last closing price
-        last_price = recent_data['Close'].iloc[-1]
-        
-        # Generate predictions
-        predictions = []
-        current_price = last_price
-        
-        for _ in range(days):
-            # Predict next day with some randomness based on volatility
-            change = avg_daily_change + np.random.normal(0, volatility/2)
-            # Limit daily change to ±3%
-            change = max(min(change, 0.03), -0.03)
-            next_price = current_price * (1 + change)
-            predictions.append(next_price)
-            current_price = next_price
-        
-        return predictions, volatility
+        result = forecast_prices(data, days, seed)
+        return list(result.prices), result.volatility
         
     except Exception as e:
         print(f"Prediction error: {str(e)}")
         return [], 0
 
-def plot_simple_forecast(data, ticker, currency):
-    """Plot recent prices and short-term forecast"""
+def plot_simple_forecast(data, ticker, currency, forecast=None):
+    """Plot recent prices and short-term forecast (pass a forecast.Forecast to reuse one)"""
     try:
-        # Get predictions for next 7 days
-        predictions, volatility = predict_next_days(data, days=7)
-        
-        if not predictions:
-            return go.Figure()
+        # Get predictions for next 7 days unless the caller already has them
+        if forecast is None:
+            forecast = forecast_prices(data, days=7)
         
         fig = go.Figure()
         
@@ -211,29 +159,19 @@ def plot_simple_forecast(data, ticker, currency):
             line=dict(color='blue')
         ))
         
-        # Plot predictions
-        future_dates = pd.date_range(
-            start=data.index[-1] + pd.Timedelta(days=1),
-            periods=len(predictions),
-            freq='D'
-        )
-        
         # Add prediction line
         fig.add_trace(go.Scatter(
-            x=future_dates,
-            y=predictions,
+            x=forecast.dates,
+            y=forecast.prices,
             mode='lines+markers',
             name='Forecast',
             line=dict(color='orange', dash='dash')
         ))
         
         # Add confidence interval
-        upper_bound = [p * (1 + volatility) for p in predictions]
-        lower_bound = [p * (1 - volatility) for p in predictions]
-        
         fig.add_trace(go.Scatter(
-            x=future_dates,
-            y=upper_bound,
+            x=forecast.dates,
+            y=forecast.upper,
             fill=None,
             mode='lines',
             line=dict(width=0),
@@ -241,17 +179,17 @@ def plot_simple_forecast(data, ticker, currency):
         ))
         
         fig.add_trace(go.Scatter(
-            x=future_dates,
-            y=lower_bound,
+            x=forecast.dates,
+            y=forecast.lower,
             fill='tonexty',
             mode='lines',
             line=dict(width=0),
-            name='Possible Range',
+            name='Possible Range (90% of simulations)',
             fillcolor='rgba(255, 165, 0, 0.2)'
         ))
         
         fig.update_layout(
-            title=f"{ticker} - 7-Day Forecast",
+            title=f"{ticker} - {len(forecast.prices)}-Day Forecast",
             xaxis_title="Date",
             yaxis_title=f"Price ({currency})",
             hovermode='x'